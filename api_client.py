@@ -0,0 +1,898 @@
+import asyncio
+import base64
+import copy
+import gzip
+import hashlib
+import json
+import math
+import socket
+import ssl
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit, urlencode, parse_qsl
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from utils import get_logger, get_worker_id, config
+
+logger = get_logger(__name__)
+
+
+class CassetteMissError(requests.ConnectionError):
+    """Request sin grabación en modo replay (offline): no se permite salir a la red"""
+
+
+class Cassette:
+    """
+    Grabación request→response en disco para reproducir llamadas sin red.
+    Las entradas se indexan por método, path + query ordenada (sin host ni puerto, para
+    reproducir contra cualquier backend) y body JSON normalizado, y se guardan como JSON
+    comprimido con gzip. Con pytest-xdist cada worker guarda su propio archivo y el
+    proceso principal los consolida al final (consolidar_cassettes_workers).
+
+    Modos:
+        off:    sin grabación
+        record: siempre va a la red y graba cada respuesta
+        replay: solo reproduce; una request no grabada lanza CassetteMissError
+        auto:   reproduce si existe la grabación, si no va a la red y la graba
+    """
+
+    MODES = ("off", "record", "replay", "auto")
+
+    # Headers que dejan de ser válidos porque el body se guarda ya decodificado
+    _HEADERS_EXCLUIDOS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+    def __init__(self, path=None, mode=None):
+        self.path = Path(path or config.API_CASSETTE_PATH)
+        self.mode = (mode or config.API_CASSETTE_MODE).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Modo de cassette no soportado: {self.mode}")
+
+        self.hits = 0
+        self.misses = 0
+        self.grabadas = 0
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if self.mode in ("replay", "auto") and self.path.exists():
+            self._entries = _leer_cassette(self.path)
+            logger.info(f"Cassette cargado: {self.path} ({len(self._entries)} grabaciones)")
+        elif self.mode == "replay":
+            logger.warning(f"Cassette no encontrado en modo replay: {self.path}")
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    @property
+    def offline(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def key(method, url, body):
+        """Clave estable de una request: método + path y query ordenada + hash del body normalizado"""
+        partes = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+        url_normalizada = (partes.path or "/") + (f"?{query}" if query else "")
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body:
+            try:
+                body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+            except ValueError:
+                pass
+        body_hash = hashlib.sha1(body or b"").hexdigest()[:16]
+
+        return f"{method.upper()} {url_normalizada} {body_hash}"
+
+    def lookup(self, request):
+        """Retorna la grabación de un PreparedRequest o None, contando hits y misses"""
+        entry = self._entries.get(self.key(request.method, request.url, request.body))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def record(self, request, response):
+        """
+        Graba la respuesta de un PreparedRequest. Los 304 no se graban: dependen de
+        If-None-Match, que no forma parte de la clave, y pisarían la respuesta completa.
+        """
+        if response.status_code == 304:
+            return
+        contenido = response.content
+        try:
+            body = {"text": contenido.decode("utf-8")}
+        except UnicodeDecodeError:
+            body = {"base64": base64.b64encode(contenido).decode("ascii")}
+
+        entry = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                k: v for k, v in response.headers.items()
+                if k.lower() not in self._HEADERS_EXCLUIDOS
+            },
+            **body
+        }
+        with self._lock:
+            self._entries[self.key(request.method, request.url, request.body)] = entry
+            self.grabadas += 1
+            self._dirty = True
+
+    @staticmethod
+    def build_response(request, entry, adapter=None):
+        """Construye un requests.Response a partir de una grabación"""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        if "base64" in entry:
+            response._content = base64.b64decode(entry["base64"])
+        else:
+            response._content = entry.get("text", "").encode("utf-8")
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        response.connection = adapter
+        return response
+
+    def save(self):
+        """
+        Escribe el cassette en disco si hubo grabaciones nuevas. En un worker de xdist escribe
+        su propio archivo (<nombre>_gwN.json.gz), que el proceso principal consolida al final.
+        """
+        if not self._dirty:
+            return
+        worker_id = get_worker_id()
+        if worker_id != "master":
+            destino = _ruta_cassette_worker(self.path, worker_id)
+            with self._lock:
+                _escribir_cassette(destino, self._entries)
+                self._dirty = False
+            logger.info(f"Cassette del worker guardado: {destino} ({len(self._entries)} grabaciones)")
+            return
+
+        with self._lock:
+            if self.path.exists():
+                existentes = _leer_cassette(self.path)
+                existentes.update(self._entries)
+                self._entries = existentes
+            _escribir_cassette(self.path, self._entries)
+            self._dirty = False
+        logger.info(f"Cassette guardado: {self.path} ({len(self._entries)} grabaciones)")
+
+    def stats(self):
+        """Hits, misses, grabaciones nuevas de este proceso y ratio de aciertos del cassette"""
+        total = self.hits + self.misses
+        return {
+            "modo": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "grabaciones": self.grabadas,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+def _ruta_cassette_worker(path, worker_id):
+    """jsonplaceholder.json.gz -> jsonplaceholder_gw0.json.gz"""
+    nombre, _, extension = path.name.partition(".")
+    return path.with_name(f"{nombre}_{worker_id}.{extension}" if extension else f"{nombre}_{worker_id}")
+
+
+def _leer_cassette(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _escribir_cassette(path, entries):
+    """Escribe a un temporal propio del proceso y lo reemplaza de forma atómica"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporal = path.with_suffix(path.suffix + f".{get_worker_id()}.tmp")
+    with gzip.open(temporal, "wt", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    temporal.replace(path)
+
+
+def consolidar_cassettes_workers(path=None):
+    """
+    Fusiona los cassettes por worker (<nombre>_gw*.json.gz) en el cassette único
+    y elimina los archivos de los workers.
+    """
+    path = Path(path or config.API_CASSETTE_PATH)
+    patron = _ruta_cassette_worker(path, "gw*").name
+    worker_cassettes = sorted(path.parent.glob(patron))
+    if not worker_cassettes:
+        return 0
+
+    entries = _leer_cassette(path) if path.exists() else {}
+    for worker_path in worker_cassettes:
+        entries.update(_leer_cassette(worker_path))
+    _escribir_cassette(path, entries)
+
+    for worker_path in worker_cassettes:
+        worker_path.unlink()
+    logger.info(f"Cassette consolidado: {path} ({len(entries)} grabaciones de {len(worker_cassettes)} workers)")
+    return len(worker_cassettes)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter con pool de conexiones configurable y contadores de uso.
+    Permite comprobar cuántas conexiones TCP/TLS se abrieron y cuántas
+    peticiones reutilizaron una conexión keep-alive existente.
+    Si recibe un Cassette, reproduce/graba las respuestas antes de tocar la red.
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, cassette=None, **kwargs):
+        self.cassette = cassette
+        # Contadores de pools ya descartados por el PoolManager
+        self._conexiones_descartadas = 0
+        self._requests_descartados = 0
+        super().__init__(
+            pool_connections=pool_connections or config.API_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or config.API_POOL_MAXSIZE,
+            **kwargs
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        # Acumular contadores antes de que un pool desalojado se cierre
+        pools = self.poolmanager.pools
+        dispose_original = pools.dispose_func
+
+        def _dispose(pool):
+            self._conexiones_descartadas += pool.num_connections
+            self._requests_descartados += pool.num_requests
+            if dispose_original:
+                dispose_original(pool)
+
+        pools.dispose_func = _dispose
+
+    def send(self, request, **kwargs):
+        cassette = self.cassette
+        if cassette is None or not cassette.enabled:
+            return super().send(request, **kwargs)
+
+        if cassette.mode in ("replay", "auto"):
+            entry = cassette.lookup(request)
+            if entry is not None:
+                return Cassette.build_response(request, entry, self)
+            if cassette.offline:
+                raise CassetteMissError(
+                    f"Sin grabación para {request.method} {request.url} (cassette {cassette.path})",
+                    request=request
+                )
+
+        response = super().send(request, **kwargs)
+        cassette.record(request, response)
+        return response
+
+    def connection_stats(self):
+        """Retorna conexiones abiertas vs. reutilizadas desde la creación del adapter"""
+        abiertas = self._conexiones_descartadas
+        requests_totales = self._requests_descartados
+
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            abiertas += pool.num_connections
+            requests_totales += pool.num_requests
+
+        return {
+            "requests": requests_totales,
+            "conexiones_abiertas": abiertas,
+            "conexiones_reutilizadas": max(requests_totales - abiertas, 0)
+        }
+
+
+def crear_sesion_api(pool_connections=None, pool_maxsize=None, cassette=None):
+    """
+    Crea una requests.Session con un PooledHTTPAdapter montado para http y https.
+    Pensada para compartirse durante toda la sesión (o worker) de pytest.
+    """
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections, pool_maxsize, cassette=cassette)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.adapter = adapter
+
+    logger.debug(
+        f"Sesión API creada (pool_connections={adapter._pool_connections}, "
+        f"pool_maxsize={adapter._pool_maxsize})"
+    )
+    return session
+
+
+def _copiar_respuesta(response):
+    """
+    Copia de una requests.Response para el cache: el body (bytes) es inmutable y se comparte;
+    headers, cookies e historial son propios de la copia.
+    """
+    copia = copy.copy(response)
+    copia.headers = CaseInsensitiveDict(response.headers)
+    copia.cookies = response.cookies.copy()
+    copia.history = list(response.history)
+    return copia
+
+
+class ResponseCache:
+    """
+    Cache en memoria de respuestas GET con desalojo LRU y TTL.
+    Al vencer el TTL, si la respuesta tenía ETag se revalida con If-None-Match:
+    un 304 renueva la entrada sin volver a descargar el body.
+    Las respuestas cacheadas se comparten entre tests y threads: APIClient.get_cached
+    entrega copias (headers, cookies e historial propios) para que no se contaminen.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or config.API_CACHE_MAX_ENTRIES
+        self.ttl = config.API_CACHE_TTL if ttl is None else ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """Retorna (entry, fresca). entry es None si la clave no está cacheada"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            fresca = time.monotonic() < entry["expires"]
+            if fresca:
+                self.hits += 1
+            return entry, fresca
+
+    def store(self, key, response):
+        with self._lock:
+            self._entries[key] = {
+                "response": response,
+                "etag": response.headers.get("ETag"),
+                "expires": time.monotonic() + self.ttl
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, key, entry):
+        """
+        Renueva el TTL de la entrada consultada tras un 304 Not Modified. Si mientras tanto
+        fue desalojada (LRU, TTL u otro thread), se vuelve a guardar.
+        """
+        with self._lock:
+            entry["expires"] = time.monotonic() + self.ttl
+            self.revalidations += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hits, misses, revalidaciones (304) y desalojos del cache"""
+        total = self.hits + self.misses + self.revalidations
+        return {
+            "entradas": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidaciones": self.revalidations,
+            "desalojos": self.evictions,
+            "hit_ratio": round((self.hits + self.revalidations) / total, 3) if total else 0.0
+        }
+
+
+class ConcurrentResult:
+    """
+    Resultado de una ráfaga de requests concurrentes.
+    Cada item contiene method, endpoint, status_code, latency_ms, error y response.
+    """
+
+    def __init__(self, backend, concurrency, items, wall_time_ms):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.items = items
+        self.wall_time_ms = wall_time_ms
+
+    @property
+    def responses(self):
+        return [item["response"] for item in self.items]
+
+    @property
+    def latencies_ms(self):
+        return [item["latency_ms"] for item in self.items]
+
+    @property
+    def requests_per_second(self):
+        if self.wall_time_ms <= 0:
+            return 0.0
+        return len(self.items) / (self.wall_time_ms / 1000)
+
+    @property
+    def errors(self):
+        return [item for item in self.items if item["error"]]
+
+    def summary(self):
+        """Resumen listo para loggear"""
+        latencias = self.latencies_ms
+        suma = sum(latencias)
+        return {
+            "backend": self.backend,
+            "concurrencia": self.concurrency,
+            "requests": len(self.items),
+            "errores": len(self.errors),
+            "wall_time_ms": round(self.wall_time_ms, 2),
+            "suma_latencias_ms": round(suma, 2),
+            "latencia_max_ms": round(max(latencias), 2) if latencias else 0.0,
+            "requests_por_segundo": round(self.requests_per_second, 2),
+            # > 1 indica que las requests realmente se solaparon
+            "speedup": round(suma / self.wall_time_ms, 2) if self.wall_time_ms > 0 else 0.0
+        }
+
+
+class APIClient:
+    """
+    Cliente HTTP para realizar peticiones a la API.
+    Es una fachada liviana por test sobre una sesión compartida: los headers
+    son propios de cada instancia y las cookies se limpian al cerrarla.
+    Con un ResponseCache, los helpers de lectura reutilizan respuestas GET
+    salvo que cache_bypass esté activo.
+    """
+
+    DEFAULT_HEADERS = {
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+
+    def __init__(self, base_url, session, headers=None, cache=None):
+        self.base_url = base_url
+        self.session = session
+        self.headers = dict(self.DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.cache = cache
+        self.cache_bypass = False
+
+    def request(self, method, endpoint, **kwargs):
+        """Realiza una petición HTTP usando los headers propios de esta instancia"""
+        url = f"{self.base_url}{endpoint}"
+        headers = dict(self.headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        inicio = time.perf_counter()
+        response = self.session.request(method, url, headers=headers, **kwargs)
+        logger.api_request(
+            method, url, response.status_code,
+            latency_ms=(time.perf_counter() - inicio) * 1000, jsonl_only=True
+        )
+        return response
+
+    def get(self, endpoint, **kwargs):
+        """
+        Realiza una petición GET
+        """
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, json=None):
+        """
+        Realiza una petición POST
+        """
+        return self.request("POST", endpoint, json=json)
+
+    def put(self, endpoint, json=None):
+        """
+        Realiza una petición PUT (reemplazo completo del recurso)
+        """
+        return self.request("PUT", endpoint, json=json)
+
+    def patch(self, endpoint, json=None):
+        """
+        Realiza una petición PATCH (actualización parcial del recurso)
+        """
+        return self.request("PATCH", endpoint, json=json)
+
+    def delete(self, endpoint):
+        """
+        Realiza una petición DELETE
+        """
+        return self.request("DELETE", endpoint)
+
+    def get_cached(self, endpoint, **kwargs):
+        """
+        GET que pasa por el ResponseCache (si hay uno y no está en bypass).
+        Solo se cachean respuestas 200; una entrada vencida con ETag se revalida.
+        """
+        if self.cache is None or self.cache_bypass:
+            return self.get(endpoint, **kwargs)
+
+        params = kwargs.get("params")
+        key = f"{self.base_url}{endpoint}"
+        if params:
+            key += "?" + urlencode(sorted(dict(params).items()))
+
+        entry, fresca = self.cache.lookup(key)
+        if entry is not None and fresca:
+            return _copiar_respuesta(entry["response"])
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+
+        response = self.get(endpoint, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            return _copiar_respuesta(self.cache.revalidated(key, entry)["response"])
+        if response.status_code == 200:
+            self.cache.store(key, _copiar_respuesta(response))
+        else:
+            self.cache.discard(key)
+        return response
+
+    @contextmanager
+    def sin_cache(self):
+        """Context manager para forzar requests a la red dentro de un bloque"""
+        anterior = self.cache_bypass
+        self.cache_bypass = True
+        try:
+            yield self
+        finally:
+            self.cache_bypass = anterior
+
+    def get_all_todos(self):
+        """Helper: Obtiene todos los TODOs"""
+        return self.get_cached("/todos")
+
+    def get_all_posts(self):
+        """Helper: Obtiene todos los posts"""
+        return self.get_cached("/posts")
+
+    def get_all_users(self):
+        """Helper: Obtiene todos los usuarios"""
+        return self.get_cached("/users")
+
+    def get_todo(self, todo_id):
+        """Helper: Obtiene un TODO por ID"""
+        return self.get_cached(f"/todos/{todo_id}")
+
+    def get_user(self, user_id):
+        """Helper: Obtiene un usuario por ID"""
+        return self.get_cached(f"/users/{user_id}")
+
+    def get_post(self, post_id):
+        """Helper: Obtiene un post por ID"""
+        return self.get_cached(f"/posts/{post_id}")
+
+    def get_user_posts(self, user_id):
+        """Helper: Obtiene posts de un usuario específico"""
+        return self.get_cached(f"/users/{user_id}/posts")
+
+    def get_post_comments(self, post_id):
+        """Helper: Obtiene comentarios de un post"""
+        return self.get_cached(f"/posts/{post_id}/comments")
+
+    def run_concurrent(self, endpoints, concurrency=None, backend=None):
+        """
+        Dispara varias requests en paralelo y mide latencia, wall time y throughput.
+
+        Args:
+            endpoints: Lista de endpoints (GET) o tuplas (method, endpoint[, kwargs])
+            concurrency: Requests simultáneas como máximo (default: Config.API_CONCURRENCY)
+            backend: "thread" o "asyncio" (default: Config.API_CONCURRENCY_BACKEND)
+
+        Returns:
+            ConcurrentResult con un item por request, en el mismo orden recibido
+        """
+        concurrency = concurrency or config.API_CONCURRENCY
+        backend = backend or config.API_CONCURRENCY_BACKEND
+        specs = [self._normalizar_spec(spec) for spec in endpoints]
+
+        if backend == "thread":
+            runner = self._run_threads
+        elif backend == "asyncio":
+            runner = self._run_asyncio
+        else:
+            raise ValueError(f"Backend de concurrencia no soportado: {backend}")
+
+        logger.debug("Ejecutando %d requests con backend=%s, concurrencia=%s", len(specs), backend, concurrency)
+        start = time.perf_counter_ns()
+        items = runner(specs, concurrency)
+        wall_time_ms = (time.perf_counter_ns() - start) / 1e6
+
+        return ConcurrentResult(backend, concurrency, items, wall_time_ms)
+
+    @staticmethod
+    def _normalizar_spec(spec):
+        if isinstance(spec, str):
+            return "GET", spec, {}
+        method, endpoint, *resto = spec
+        return method.upper(), endpoint, (resto[0] if resto else {})
+
+    def _timed_request(self, spec):
+        """Ejecuta una request midiendo su latencia; nunca lanza excepción"""
+        method, endpoint, kwargs = spec
+        item = {"method": method, "endpoint": endpoint, "status_code": None,
+                "latency_ms": 0.0, "error": None, "response": None}
+        start = time.perf_counter_ns()
+        try:
+            response = self.request(method, endpoint, **kwargs)
+            item["response"] = response
+            item["status_code"] = response.status_code
+        except Exception as e:
+            item["error"] = str(e)
+        item["latency_ms"] = (time.perf_counter_ns() - start) / 1e6
+        return item
+
+    def _run_threads(self, specs, concurrency):
+        # El pool del adapter debe admitir al menos `concurrency` conexiones
+        # (API_POOL_MAXSIZE) para no descartar conexiones keep-alive
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(self._timed_request, specs))
+
+    def _run_asyncio(self, specs, concurrency):
+        """
+        Corrutinas limitadas por un semáforo que delegan cada request bloqueante a un thread.
+        Pasa por la misma sesión que el backend thread (adapter con sus contadores, logging,
+        cassette) y retorna los mismos requests.Response.
+        """
+        return asyncio.run(self._gather_to_thread(specs, concurrency))
+
+    async def _gather_to_thread(self, specs, concurrency):
+        # Executor propio de `concurrency` threads: el default del loop (min(32, cpus + 4))
+        # limitaría en silencio la concurrencia pedida
+        loop = asyncio.get_running_loop()
+        semaforo = asyncio.Semaphore(concurrency)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+            async def _uno(spec):
+                async with semaforo:
+                    return await loop.run_in_executor(executor, self._timed_request, spec)
+
+            return await asyncio.gather(*(_uno(spec) for spec in specs))
+
+    @property
+    def cassette(self):
+        adapter = getattr(self.session, "adapter", None)
+        return getattr(adapter, "cassette", None)
+
+    def is_offline(self):
+        """True si las requests se sirven solo desde el cassette (sin red)"""
+        cassette = self.cassette
+        return bool(cassette and cassette.offline)
+
+    def connection_stats(self):
+        """Contadores de conexiones de la sesión compartida"""
+        adapter = getattr(self.session, "adapter", None)
+        if adapter is None:
+            return {}
+        return adapter.connection_stats()
+
+    def close(self):
+        """Libera el estado propio del test sin cerrar la sesión compartida"""
+        self.session.cookies.clear()
+
+
+def formatear_estadisticas_api(stats):
+    """
+    Líneas de resumen de conexiones, cassette y cache de la sesión (sumadas entre workers
+    con xdist, por eso los hit ratio se recalculan a partir de los contadores)
+    """
+    lineas = []
+    conexiones = stats.get("conexiones")
+    if conexiones:
+        lineas.append(
+            f"requests: {conexiones['requests']} | conexiones abiertas: {conexiones['conexiones_abiertas']} "
+            f"| reutilizadas: {conexiones['conexiones_reutilizadas']}"
+        )
+    cassette = stats.get("cassette")
+    if cassette:
+        total = cassette["hits"] + cassette["misses"]
+        lineas.append(
+            f"cassette ({cassette['modo']}): hits {cassette['hits']} | misses {cassette['misses']} "
+            f"| hit ratio {cassette['hits'] / total if total else 0.0:.1%} | grabaciones nuevas {cassette['grabaciones']}"
+        )
+    cache = stats.get("cache")
+    if cache:
+        aciertos = cache["hits"] + cache["revalidaciones"]
+        total = aciertos + cache["misses"]
+        lineas.append(
+            f"cache GET: hits {cache['hits']} | misses {cache['misses']} "
+            f"| revalidaciones {cache['revalidaciones']} | desalojos {cache['desalojos']} "
+            f"| hit ratio {aciertos / total if total else 0.0:.1%}"
+        )
+    return lineas
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) con interpolación lineal entre las muestras ordenadas"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = math.floor(posicion)
+    superior = math.ceil(posicion)
+    if inferior == superior:
+        return ordenados[inferior]
+    fraccion = posicion - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
+
+
+def resumir_latencias(muestras_ms):
+    """Calcula min/p50/p90/p99/max, media y desvío estándar de una lista de muestras en ms"""
+    if not muestras_ms:
+        return {}
+    return {
+        "min_ms": round(min(muestras_ms), 3),
+        "p50_ms": round(percentil(muestras_ms, 50), 3),
+        "p90_ms": round(percentil(muestras_ms, 90), 3),
+        "p99_ms": round(percentil(muestras_ms, 99), 3),
+        "max_ms": round(max(muestras_ms), 3),
+        "media_ms": round(statistics.fmean(muestras_ms), 3),
+        "stddev_ms": round(statistics.stdev(muestras_ms), 3) if len(muestras_ms) > 1 else 0.0
+    }
+
+
+class APIBenchmark:
+    """
+    Benchmark de latencia sobre un APIClient.
+    Ejecuta warm-up + N iteraciones medidas con perf_counter_ns por endpoint y
+    separa TTFB (hasta recibir headers) de descarga del body. DNS, connect y TLS
+    se miden una vez en frío, porque las iteraciones reutilizan la conexión keep-alive.
+    """
+
+    def __init__(self, client, warmup=2, iterations=10):
+        self.client = client
+        self.warmup = warmup
+        self.iterations = iterations
+
+    def medir_conexion_fria(self, timeout=10):
+        """Mide DNS, TCP connect y handshake TLS hacia el host del base_url"""
+        partes = urlsplit(self.client.base_url)
+        host = partes.hostname
+        port = partes.port or (443 if partes.scheme == "https" else 80)
+        fases = {"dns_ms": None, "connect_ms": None, "tls_ms": None}
+
+        if self.client.is_offline():
+            return fases
+
+        try:
+            start = time.perf_counter_ns()
+            direcciones = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            fases["dns_ms"] = round((time.perf_counter_ns() - start) / 1e6, 3)
+
+            family, socktype, proto, _, sockaddr = direcciones[0]
+            with socket.socket(family, socktype, proto) as sock:
+                sock.settimeout(timeout)
+                start = time.perf_counter_ns()
+                sock.connect(sockaddr)
+                fases["connect_ms"] = round((time.perf_counter_ns() - start) / 1e6, 3)
+
+                if partes.scheme == "https":
+                    contexto = ssl.create_default_context()
+                    start = time.perf_counter_ns()
+                    with contexto.wrap_socket(sock, server_hostname=host):
+                        fases["tls_ms"] = round((time.perf_counter_ns() - start) / 1e6, 3)
+        except OSError as e:
+            logger.warning(f"No se pudo medir la conexión en frío a {host}:{port}: {e}")
+
+        return fases
+
+    def _muestra(self, method, endpoint):
+        """Una iteración: retorna (status_code, total_ms, ttfb_ms, download_ms, bytes)"""
+        start = time.perf_counter_ns()
+        response = self.client.request(method, endpoint, stream=True)
+        headers_ns = time.perf_counter_ns()
+        contenido = response.content
+        end = time.perf_counter_ns()
+        response.close()
+        return (
+            response.status_code,
+            (end - start) / 1e6,
+            (headers_ns - start) / 1e6,
+            (end - headers_ns) / 1e6,
+            len(contenido)
+        )
+
+    def run(self, endpoint, method="GET", warmup=None, iterations=None):
+        """
+        Ejecuta el benchmark de un endpoint.
+
+        Returns:
+            dict con estadísticas de total/TTFB/descarga, fases en frío y status codes
+        """
+        warmup = self.warmup if warmup is None else warmup
+        iterations = self.iterations if iterations is None else iterations
+
+        logger.debug("Benchmark %s %s: warmup=%s, iteraciones=%s", method, endpoint, warmup, iterations)
+        fases_frias = self.medir_conexion_fria()
+
+        for _ in range(warmup):
+            self._muestra(method, endpoint)
+
+        totales, ttfbs, descargas, status_codes = [], [], [], []
+        bytes_respuesta = 0
+        for _ in range(iterations):
+            status, total, ttfb, descarga, tamaño = self._muestra(method, endpoint)
+            status_codes.append(status)
+            totales.append(total)
+            ttfbs.append(ttfb)
+            descargas.append(descarga)
+            bytes_respuesta = tamaño
+
+        return {
+            "endpoint": endpoint,
+            "method": method,
+            "base_url": self.client.base_url,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "warmup": warmup,
+            "iteraciones": iterations,
+            "bytes_respuesta": bytes_respuesta,
+            "status_codes": sorted(set(status_codes)),
+            "conexion_fria": fases_frias,
+            "total": resumir_latencias(totales),
+            "ttfb": resumir_latencias(ttfbs),
+            "descarga": resumir_latencias(descargas)
+        }
+
+    @staticmethod
+    def check_budget(resultado, presupuesto):
+        """
+        Compara las estadísticas totales contra un presupuesto (p50_ms, p90_ms, p99_ms, max_ms).
+
+        Returns:
+            Lista de violaciones en texto; vacía si cumple
+        """
+        violaciones = []
+        for metrica in ("p50_ms", "p90_ms", "p99_ms", "max_ms"):
+            limite = presupuesto.get(metrica)
+            if limite is None:
+                continue
+            valor = resultado["total"].get(metrica, 0.0)
+            if valor > limite:
+                violaciones.append(f"{metrica}={valor}ms > {limite}ms")
+        return violaciones
+
+    @staticmethod
+    def export(resultados, directorio=None):
+        """Exporta los resultados como JSON con timestamp para seguimiento de tendencias"""
+        directorio = Path(directorio or config.BENCHMARKS_DIR)
+        directorio.mkdir(parents=True, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        worker_id = get_worker_id()
+        sufijo = "" if worker_id == "master" else f"_{worker_id}"
+        ruta = directorio / f"latencia_api_{timestamp}{sufijo}.json"
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"generado": timestamp, "resultados": resultados}, f, indent=2, ensure_ascii=False)
+
+        logger.info(f"Benchmark de latencia exportado: {ruta}")
+        return str(ruta)
@@ -1,7 +1,197 @@
+import itertools
+import os
+import re
 import sys
 from pathlib import Path
 
+import pytest
+
 root_dir = Path(__file__).parent
 sys.path.insert(0, str(root_dir))
 
-print(f"PYTHONPATH configurado: {root_dir}")
\ No newline at end of file
+UI_TESTS_DIR = root_dir / "tests" / "ui"
+# Marcadores que siempre tienen (ui) o nunca tienen (api, perf) los tests de UI
+_MARCAS_UI = {"ui": True, "api": False, "perf": False}
+
+
+def pytest_addoption(parser):
+    """Opciones de línea de comandos del framework"""
+    parser.addoption(
+        "--api-backend",
+        action="store",
+        choices=["remote", "local"],
+        default=None,
+        help="Backend para los tests de API: remote (JSONPlaceholder) o local (servidor en proceso). "
+             "Por defecto usa la variable de entorno API_BACKEND."
+    )
+    parser.addoption(
+        "--api-cassette",
+        action="store",
+        choices=["off", "record", "replay", "auto"],
+        default=None,
+        help="Modo del cassette HTTP de los tests de API (replay = offline, sin red). "
+             "Por defecto usa la variable de entorno API_CASSETTE_MODE."
+    )
+    parser.addoption(
+        "--api-cache",
+        action="store_true",
+        default=False,
+        help="Activa el cache en memoria de respuestas GET de los helpers del APIClient "
+             "(equivalente a API_CACHE=true)."
+    )
+    parser.addoption(
+        "--screenshot-report-mode",
+        action="store",
+        choices=["embed", "link"],
+        default=None,
+        help="Screenshots en el reporte HTML: embed (base64 inline) o link (miniatura + enlace "
+             "al archivo en disco, reporte más liviano). Por defecto usa SCREENSHOT_REPORT_MODE."
+    )
+
+
+def pytest_ignore_collect(collection_path, config):
+    """
+    Si la expresión de -m no puede seleccionar ningún test de UI (p. ej. -m api o -m "not ui"),
+    no se colecciona tests/ui: su conftest, Selenium y los extras de pytest-html no se importan.
+    """
+    if collection_path != UI_TESTS_DIR:
+        return None
+
+    markexpr = config.getoption("markexpr")
+    if markexpr and not _expresion_puede_seleccionar_ui(markexpr):
+        return True
+    return None
+
+
+def _expresion_puede_seleccionar_ui(markexpr):
+    """
+    Evalúa la expresión para todas las combinaciones de los marcadores opcionales
+    (smoke, regression...) que menciona; ante cualquier duda se colecciona.
+
+    Usa el parser de expresiones de -m de pytest (_pytest.mark.expression), que es API
+    privada: escrito contra pytest 8.3 (versión fijada en requirements.txt). Si el módulo
+    o su firma cambian, la función falla abierta y tests/ui se colecciona como siempre.
+    """
+    try:
+        from _pytest.mark.expression import Expression
+        expresion = Expression.compile(markexpr)
+    except Exception:
+        return True
+
+    opcionales = sorted(
+        set(re.findall(r"[A-Za-z_][\w.]*", markexpr)) - {"and", "or", "not", "True", "False"} - set(_MARCAS_UI)
+    )
+    if len(opcionales) > 10:
+        return True
+
+    for combinacion in itertools.product((False, True), repeat=len(opcionales)):
+        marcas = dict(_MARCAS_UI, **dict(zip(opcionales, combinacion)))
+        try:
+            # pytest >= 8.4 también pasa los argumentos del marcador como kwargs
+            if expresion.evaluate(lambda nombre, marcas=marcas, **_: marcas.get(nombre, False)):
+                return True
+        except Exception:
+            return True
+    return False
+
+
+def pytest_runtest_logreport(report):
+    """Ante un fallo, asegura que el log ya esté en disco (relevante con LOG_ASYNC=true)"""
+    if report.failed:
+        from utils import flush_logs
+        flush_logs()
+
+
+def pytest_sessionfinish(session):
+    """
+    Vacía el log pendiente y, en corridas paralelas (pytest-xdist), envía las estadísticas
+    del worker al controlador y consolida los logs, los manifests de screenshots y los
+    cassettes de los workers en archivos únicos
+    """
+    from utils import flush_logs
+    flush_logs()
+
+    if hasattr(session.config, "workerinput"):
+        # El controlador no ejecuta tests: recibe lo agregado en cada worker (ver pytest_testnodedown)
+        from utils import span_recorder, estadisticas_sesion
+        session.config.workeroutput["spans_sesion"] = span_recorder.exportar()
+        session.config.workeroutput["estadisticas_sesion"] = estadisticas_sesion
+        return
+
+    from utils import consolidar_logs_workers, config
+    from screenshots import consolidar_manifests_workers
+    consolidar_logs_workers()
+    consolidar_manifests_workers()
+
+    if (session.config.getoption("--api-cassette") or config.API_CASSETTE_MODE) != "off":
+        from api_client import consolidar_cassettes_workers
+        consolidar_cassettes_workers()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Controlador de xdist: suma el desglose de spans y las estadísticas que envía cada worker al terminar"""
+    from utils import span_recorder, estadisticas_sesion, sumar_estadisticas
+    salida = getattr(node, "workeroutput", {})
+    span_recorder.importar(salida.get("spans_sesion", []))
+    sumar_estadisticas(estadisticas_sesion, salida.get("estadisticas_sesion", {}))
+
+
+def pytest_html_results_summary(prefix, summary, postfix):
+    """
+    Desglose de tiempos de la sesión UI (spans agregados de todos los tests y workers) y
+    estadísticas de red de la API. Vive en el conftest raíz porque con xdist el controlador
+    no carga los conftest de tests/ui ni tests/api.
+    """
+    from utils import span_recorder, tabla_spans_html, SCRIPT_ORDENAR_SPANS
+    filas = span_recorder.session_breakdown()
+    if filas:
+        prefix.append(SCRIPT_ORDENAR_SPANS)
+        prefix.append(tabla_spans_html(filas, "UI: desglose de tiempos de la sesión"))
+
+    lineas = _lineas_resumen_api()
+    if lineas:
+        prefix.append("<h3>API: conexiones, cassette y cache</h3>")
+        prefix.extend(f"<p>{linea}</p>" for linea in lineas)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Resumen de uso de red de los tests de API y tamaño del reporte HTML de los tests de UI"""
+    lineas = _lineas_resumen_api()
+    if lineas:
+        terminalreporter.section("API: conexiones, cassette y cache")
+        for linea in lineas:
+            terminalreporter.write_line(linea)
+
+    _resumen_reporte_html(terminalreporter)
+
+
+def _resumen_reporte_html(terminalreporter):
+    """Tamaño del reporte HTML generado y peso de las screenshots embebidas/enlazadas"""
+    from utils import estadisticas_sesion, config
+
+    stats = estadisticas_sesion.get("reporte")
+    pytest_config = terminalreporter.config
+    reporte = pytest_config.getoption("htmlpath", None)
+    if stats is None or not reporte or not os.path.exists(reporte):
+        return
+
+    modo = pytest_config.getoption("--screenshot-report-mode") or config.SCREENSHOT_REPORT_MODE
+    terminalreporter.section("Reporte HTML")
+    terminalreporter.write_line(f"{reporte}: {os.path.getsize(reporte) / 1024:.0f} KB (screenshots en modo {modo})")
+    if stats["embebidas"] or stats["enlazadas"]:
+        terminalreporter.write_line(
+            f"screenshots embebidas: {stats['embebidas']} ({stats['bytes_embebidos'] / 1024:.0f} KB inline) "
+            f"| enlazadas: {stats['enlazadas']} ({stats['bytes_enlazados'] / 1024:.0f} KB en disco)"
+        )
+
+
+def _lineas_resumen_api():
+    """Líneas del resumen de la API; vacío (sin importar requests) si no corrieron tests de API"""
+    from utils import estadisticas_sesion
+    stats = estadisticas_sesion.get("api")
+    if not stats:
+        return []
+
+    from api_client import formatear_estadisticas_api
+    return formatear_estadisticas_api(stats)
@@ -0,0 +1,146 @@
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from utils import get_logger, config, limpiar_navegador
+
+logger = get_logger(__name__)
+
+
+class DriverPool:
+    """
+    Pool de navegadores Chrome "calientes" por worker.
+    Entre tests el navegador se resetea (cookies, localStorage, sessionStorage,
+    ventanas extra) en lugar de cerrarse; se recicla al superar max_uses
+    o si falla el health check.
+    Con size=0 se comporta como antes: un navegador nuevo por test.
+    """
+
+    def __init__(self, options_factory, size=None, max_uses=None):
+        self._options_factory = options_factory
+        self.size = config.DRIVER_POOL_SIZE if size is None else size
+        self.max_uses = max_uses or config.DRIVER_MAX_USES
+        self._idle = []
+        self._usos = {}
+        self.stats = {"creados": 0, "reutilizados": 0, "reciclados": 0, "fallas_salud": 0}
+
+    def _crear(self):
+        """Inicializa un WebDriver nuevo con los timeouts del framework"""
+        logger.info("Inicializando WebDriver con Selenium Manager...")
+        driver = webdriver.Chrome(service=Service(), options=self._options_factory())
+        # Sin wait implícito (salvo WAIT_POLICY=legacy) para no apilarlo sobre las esperas explícitas
+        driver.implicitly_wait(config.implicit_wait())
+        driver.set_page_load_timeout(config.PAGE_LOAD_TIMEOUT)
+
+        self._usos[id(driver)] = 0
+        self.stats["creados"] += 1
+        logger.info("WebDriver listo")
+        return driver
+
+    def _quit(self, driver):
+        self._usos.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error al cerrar driver: {e}")
+
+    @staticmethod
+    def is_healthy(driver):
+        """Health check: el navegador responde a un comando trivial"""
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def warm_up(self):
+        """Crea navegadores hasta completar el tamaño del pool"""
+        while len(self._idle) < self.size:
+            self._idle.append(self._crear())
+        if self.size:
+            logger.info(f"Pool de drivers listo con {len(self._idle)} navegador(es)")
+
+    def acquire(self):
+        """Entrega un navegador sano, reutilizando uno del pool si hay disponible"""
+        while self._idle:
+            driver = self._idle.pop()
+            if self.is_healthy(driver):
+                self.stats["reutilizados"] += 1
+                logger.info(f"Reutilizando navegador del pool (usos: {self._usos.get(id(driver), 0)})")
+                return driver
+
+            self.stats["fallas_salud"] += 1
+            logger.warning("Navegador del pool no responde, reciclando")
+            self._quit(driver)
+
+        return self._crear()
+
+    def release(self, driver):
+        """Devuelve el navegador al pool reseteado, o lo cierra si corresponde reciclarlo"""
+        usos = self._usos.get(id(driver), 0) + 1
+        self._usos[id(driver)] = usos
+
+        if len(self._idle) >= self.size:
+            limpiar_navegador(driver, logger)
+            self._quit(driver)
+            logger.info("WebDriver cerrado y limpiado")
+            return
+
+        if usos >= self.max_uses:
+            logger.info(f"Navegador alcanzó {usos} usos, reciclando")
+            self.stats["reciclados"] += 1
+            self._quit(driver)
+            return
+
+        if not self.reset(driver):
+            self.stats["reciclados"] += 1
+            self._quit(driver)
+            return
+
+        self._idle.append(driver)
+
+    def reset(self, driver):
+        """
+        Deja el navegador como nuevo: cierra ventanas extra, limpia cookies y storage
+        (también vía CDP para el origen de la app) y navega a about:blank.
+        """
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            limpiar_navegador(driver, logger)
+            self._limpiar_via_cdp(driver)
+            driver.get("about:blank")
+            logger.debug("Navegador reseteado para el siguiente test")
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo resetear el navegador: {e}")
+            return False
+
+    @staticmethod
+    def _limpiar_via_cdp(driver):
+        """Limpia cookies y storage de la app vía Chrome DevTools Protocol si está disponible"""
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return
+
+        partes = urlsplit(config.SAUCEDEMO_URL)
+        origin = f"{partes.scheme}://{partes.netloc}"
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": origin,
+                "storageTypes": "local_storage,session_storage,indexeddb,cache_storage,service_workers"
+            })
+        except Exception as e:
+            logger.debug("Limpieza vía CDP no disponible: %s", e)
+
+    def close(self):
+        """Cierra todos los navegadores del pool"""
+        while self._idle:
+            self._quit(self._idle.pop())
+        logger.info(
+            f"Pool de drivers cerrado - creados: {self.stats['creados']}, "
+            f"reutilizados: {self.stats['reutilizados']}, reciclados: {self.stats['reciclados']}, "
+            f"fallas de salud: {self.stats['fallas_salud']}"
+        )
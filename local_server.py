@@ -0,0 +1,322 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+
+# Relaciones anidadas soportadas: /<padre>/<id>/<hijo> filtra <hijo> por <campo>
+NESTED_ROUTES = {
+    ("users", "posts"): "userId",
+    ("users", "todos"): "userId",
+    ("posts", "comments"): "postId",
+}
+
+PAGINATION_PARAMS = ("_start", "_end", "_limit")
+
+
+class JSONPlaceholderDB:
+    """
+    Datos en memoria con la misma forma y cantidades que JSONPlaceholder:
+    10 users, 100 posts, 500 comments y 200 todos, generados de forma determinística.
+    """
+
+    def __init__(self):
+        self.resources = {
+            "users": self._generar_users(),
+            "posts": self._generar_posts(),
+            "comments": self._generar_comments(),
+            "todos": self._generar_todos(),
+        }
+        self._by_id = {
+            name: {item["id"]: item for item in items}
+            for name, items in self.resources.items()
+        }
+        # Respuestas sin filtros pre-serializadas (el caso más frecuente)
+        self._serialized = {name: _dumps(items) for name, items in self.resources.items()}
+
+    @staticmethod
+    def _generar_users():
+        users = []
+        for user_id in range(1, 11):
+            users.append({
+                "id": user_id,
+                "name": f"Usuario Local {user_id}",
+                "username": f"usuario{user_id}",
+                "email": f"usuario{user_id}@local.test",
+                "address": {
+                    "street": f"Calle {user_id}",
+                    "suite": f"Suite {user_id * 100}",
+                    "city": "Ciudad Local",
+                    "zipcode": f"{10000 + user_id}",
+                    "geo": {"lat": f"-34.{user_id:04d}", "lng": f"-58.{user_id:04d}"}
+                },
+                "phone": f"+54-11-0000-{user_id:04d}",
+                "website": f"usuario{user_id}.local",
+                "company": {
+                    "name": f"Empresa {user_id}",
+                    "catchPhrase": "Servidor local para tests herméticos",
+                    "bs": "local testing"
+                }
+            })
+        return users
+
+    @staticmethod
+    def _generar_posts():
+        return [
+            {
+                "userId": (post_id - 1) // 10 + 1,
+                "id": post_id,
+                "title": f"post local {post_id}",
+                "body": f"contenido del post local {post_id}"
+            }
+            for post_id in range(1, 101)
+        ]
+
+    @staticmethod
+    def _generar_comments():
+        return [
+            {
+                "postId": (comment_id - 1) // 5 + 1,
+                "id": comment_id,
+                "name": f"comentario local {comment_id}",
+                "email": f"comentario{comment_id}@local.test",
+                "body": f"contenido del comentario local {comment_id}"
+            }
+            for comment_id in range(1, 501)
+        ]
+
+    @staticmethod
+    def _generar_todos():
+        return [
+            {
+                "userId": (todo_id - 1) // 20 + 1,
+                "id": todo_id,
+                "title": f"todo local {todo_id}",
+                "completed": todo_id % 3 == 0
+            }
+            for todo_id in range(1, 201)
+        ]
+
+    def has(self, resource):
+        return resource in self.resources
+
+    def get(self, resource, resource_id):
+        return self._by_id[resource].get(resource_id)
+
+    def next_id(self, resource):
+        # JSONPlaceholder no persiste: siempre asigna el siguiente ID al total actual
+        return len(self.resources[resource]) + 1
+
+    def query(self, resource, filtros):
+        """Retorna el body serializado de una colección aplicando filtros y paginación estilo json-server"""
+        if not filtros:
+            return self._serialized[resource]
+
+        items = self.resources[resource]
+        condiciones = {}
+        paginacion = {}
+        for key, value in filtros:
+            if key in PAGINATION_PARAMS:
+                # Como JSONPlaceholder, un valor no numérico (?_limit=abc) se ignora
+                try:
+                    paginacion[key] = int(value)
+                except ValueError:
+                    pass
+            else:
+                condiciones.setdefault(key, set()).add(value)
+
+        if condiciones:
+            items = [
+                item for item in items
+                if all(_as_query_value(item.get(campo)) in valores for campo, valores in condiciones.items())
+            ]
+
+        inicio = paginacion.get("_start", 0)
+        if "_end" in paginacion:
+            items = items[inicio:paginacion["_end"]]
+        elif "_limit" in paginacion:
+            items = items[inicio:inicio + paginacion["_limit"]]
+        elif inicio:
+            items = items[inicio:]
+
+        return _dumps(items)
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _as_query_value(value):
+    """Representación de un valor tal como llega en un query string"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class _JSONPlaceholderHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 con keep-alive que emula las rutas de JSONPlaceholder"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers y body salen en escrituras separadas: sin TCP_NODELAY cada respuesta
+    # pagaría el delayed ACK del cliente (~40ms)
+    disable_nagle_algorithm = True
+    db = None
+
+    def log_message(self, format, *args):
+        logger.debug("Servidor local: " + format, *args)
+
+    def _send(self, status, body=b"{}"):
+        etag = None
+        if self.command == "GET" and status == 200:
+            etag = f'W/"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parse_path(self):
+        """Retorna (resource, id, nested, filtros) o None si la ruta no es válida"""
+        partes_url = urlsplit(self.path)
+        partes = [p for p in partes_url.path.split("/") if p]
+        filtros = parse_qsl(partes_url.query, keep_blank_values=True)
+
+        if not partes or not self.db.has(partes[0]) or len(partes) > 3:
+            return None
+
+        resource_id = None
+        if len(partes) >= 2:
+            if not partes[1].isdigit():
+                return None
+            resource_id = int(partes[1])
+
+        nested = partes[2] if len(partes) == 3 else None
+        if nested and (partes[0], nested) not in NESTED_ROUTES:
+            return None
+
+        return partes[0], resource_id, nested, filtros
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def do_GET(self):
+        ruta = self._parse_path()
+        if ruta is None:
+            return self._send(404)
+
+        resource, resource_id, nested, filtros = ruta
+        if resource_id is None:
+            return self._send(200, self.db.query(resource, filtros))
+
+        if nested:
+            campo = NESTED_ROUTES[(resource, nested)]
+            return self._send(200, self.db.query(nested, [(campo, str(resource_id))] + filtros))
+
+        item = self.db.get(resource, resource_id)
+        if item is None:
+            return self._send(404)
+        return self._send(200, _dumps(item))
+
+    def do_POST(self):
+        ruta = self._parse_path()
+        if ruta is None or ruta[1] is not None:
+            return self._send(404)
+
+        resource = ruta[0]
+        body = self._read_json()
+        body["id"] = self.db.next_id(resource)
+        self._send(201, _dumps(body))
+
+    def do_PUT(self):
+        ruta = self._parse_path()
+        if ruta is None or ruta[1] is None or ruta[2]:
+            return self._send(404)
+
+        resource, resource_id, _, _ = ruta
+        if self.db.get(resource, resource_id) is None:
+            # JSONPlaceholder responde 500 al reemplazar un recurso inexistente
+            return self._send(500)
+
+        body = self._read_json()
+        body["id"] = resource_id
+        self._send(200, _dumps(body))
+
+    def do_PATCH(self):
+        ruta = self._parse_path()
+        if ruta is None or ruta[1] is None or ruta[2]:
+            return self._send(404)
+
+        resource, resource_id, _, _ = ruta
+        item = self.db.get(resource, resource_id)
+        if item is None:
+            return self._send(404)
+
+        actualizado = dict(item)
+        actualizado.update(self._read_json())
+        actualizado["id"] = resource_id
+        self._send(200, _dumps(actualizado))
+
+    def do_DELETE(self):
+        ruta = self._parse_path()
+        if ruta is None or ruta[1] is None:
+            return self._send(404)
+        # Igual que JSONPlaceholder: 200 incluso para recursos inexistentes
+        self._send(200)
+
+
+class LocalJSONPlaceholderServer:
+    """
+    Servidor local en proceso que reemplaza a JSONPlaceholder para corridas herméticas.
+    Corre en un thread daemon; las escrituras son ficticias igual que en el servicio real.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        handler = type("Handler", (_JSONPlaceholderHandler,), {"db": JSONPlaceholderDB()})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="local-jsonplaceholder",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Servidor local JSONPlaceholder escuchando en {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("Servidor local JSONPlaceholder detenido")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
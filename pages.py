@@ -1,42 +1,464 @@
+import functools
+import inspect
+import logging
+import time
+import weakref
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from utils import get_logger
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
+)
+from utils import get_logger, config, span_recorder
+
+
+# Script timeout configurado por driver (evita un round trip extra en cada espera)
+_script_timeouts = weakref.WeakKeyDictionary()
+
+
+class WaitMetrics:
+    """
+    Registro de la duración real de cada espera frente a su presupuesto (timeout).
+    Marca como excedidas las esperas que tardaron más que su timeout declarado
+    (más una tolerancia para el último round trip), típico de waits implícitos apilados.
+    """
+    
+    TOLERANCIA = 0.25
+    
+    def __init__(self):
+        self.registros = []
+    
+    def record(self, descripcion, condicion, estrategia, duracion, timeout, exito):
+        registro = {
+            "descripcion": descripcion,
+            "condicion": condicion,
+            "estrategia": estrategia,
+            "duracion": duracion,
+            "timeout": timeout,
+            "exito": exito,
+            "excedida": duracion > timeout + self.TOLERANCIA
+        }
+        self.registros.append(registro)
+        return registro
+    
+    def excedidas(self):
+        """Esperas cuya duración real superó su timeout declarado"""
+        return [r for r in self.registros if r["excedida"]]
+    
+    def summary(self):
+        """Totales de la sesión: cantidad de esperas, tiempo total/promedio/máximo y timeouts"""
+        if not self.registros:
+            return {
+                "esperas": 0, "total_s": 0.0, "promedio_ms": 0.0, "max_ms": 0.0,
+                "timeouts": 0, "excedidas": 0, "uso_presupuesto": 0.0
+            }
+        
+        duraciones = [r["duracion"] for r in self.registros]
+        presupuesto = sum(r["timeout"] for r in self.registros)
+        return {
+            "esperas": len(duraciones),
+            "total_s": sum(duraciones),
+            "promedio_ms": sum(duraciones) / len(duraciones) * 1000,
+            "max_ms": max(duraciones) * 1000,
+            "timeouts": sum(1 for r in self.registros if not r["exito"]),
+            "excedidas": len(self.excedidas()),
+            "uso_presupuesto": sum(duraciones) / presupuesto if presupuesto else 0.0
+        }
+    
+    def clear(self):
+        self.registros.clear()
+
+
+wait_metrics = WaitMetrics()
+
+
+class StrategyMetrics:
+    """Ejecuciones, éxitos y tiempo por estrategia (p.ej. las de reset_app_state)"""
+    
+    def __init__(self):
+        self.estrategias = {}
+    
+    def record(self, estrategia, duracion, exito):
+        datos = self.estrategias.setdefault(estrategia, {"ejecuciones": 0, "exitos": 0, "total_s": 0.0})
+        datos["ejecuciones"] += 1
+        datos["exitos"] += int(exito)
+        datos["total_s"] += duracion
+    
+    def summary(self):
+        return {
+            estrategia: dict(datos, promedio_ms=datos["total_s"] / datos["ejecuciones"] * 1000)
+            for estrategia, datos in self.estrategias.items()
+        }
+    
+    def clear(self):
+        self.estrategias.clear()
+
+
+reset_metrics = StrategyMetrics()
+
+
+class LocatorRegistry:
+    """
+    WebElements ya resueltos por driver para el render actual de la página (locator -> WebElement).
+    Lo alimentan las esperas que devuelven el elemento, y find_element lo consulta antes de
+    ir al DOM. Se invalida en clicks y navegaciones; si igual un elemento quedó obsoleto
+    (re-render), quien lo usa lo descarta y lo resuelve de nuevo.
+    """
+    
+    def __init__(self):
+        self._por_driver = weakref.WeakKeyDictionary()
+        self.stats = {"hits": 0, "misses": 0, "obsoletos": 0, "invalidaciones": 0}
+    
+    def get(self, driver, locator):
+        elemento = self._por_driver.get(driver, {}).get(locator)
+        self.stats["hits" if elemento is not None else "misses"] += 1
+        return elemento
+    
+    def put(self, driver, locator, elemento):
+        self._por_driver.setdefault(driver, {})[locator] = elemento
+    
+    def discard(self, driver, locator, obsoleto=False):
+        self._por_driver.get(driver, {}).pop(locator, None)
+        if obsoleto:
+            self.stats["obsoletos"] += 1
+    
+    def invalidate(self, driver):
+        """La página cambió (navegación, recarga, click): ningún elemento guardado es confiable"""
+        elementos = self._por_driver.get(driver)
+        if elementos:
+            elementos.clear()
+            self.stats["invalidaciones"] += 1
+    
+    def summary(self):
+        consultas = self.stats["hits"] + self.stats["misses"]
+        return dict(self.stats, hit_ratio=self.stats["hits"] / consultas if consultas else 0.0)
+    
+    def clear(self):
+        self._por_driver.clear()
+        self.stats = dict.fromkeys(self.stats, 0)
+
+
+locator_registry = LocatorRegistry()
+
+
+def _cambia_pagina(metodo):
+    """Invalida los elementos guardados del driver al terminar un método que navega o re-renderiza"""
+    @functools.wraps(metodo)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            locator_registry.invalidate(self.driver)
+    return wrapper
+
+
+def _con_span(nombre, metodo):
+    @functools.wraps(metodo)
+    def wrapper(*args, **kwargs):
+        with span_recorder.span(nombre):
+            return metodo(*args, **kwargs)
+    wrapper._con_span = True
+    return wrapper
+
+
+def _instrumentar_metodos(cls):
+    """Envuelve cada método público definido en la clase con un span 'Clase.método'"""
+    for nombre, metodo in list(vars(cls).items()):
+        if nombre.startswith("_") or not inspect.isfunction(metodo) or getattr(metodo, "_con_span", False):
+            continue
+        setattr(cls, nombre, _con_span(f"{cls.__name__}.{nombre}", metodo))
 
 
 class BasePage:
-    """Clase base para todos los Page Objects"""
+    """
+    Clase base para todos los Page Objects.
+    Los métodos públicos de BasePage y de sus subclases se miden automáticamente como spans.
+    """
     
     DEFAULT_TIMEOUT = 10  
     SHORT_TIMEOUT = 5     
     
+    # Polling adaptativo: arranca rápido y crece exponencialmente hasta el máximo
+    POLL_INITIAL = 0.02
+    POLL_FACTOR = 1.5
+    POLL_MAX = 0.25
+    
+    # Resolución de locators (By, valor) dentro de la página, compartida por los scripts
+    FINDER_SCRIPT = """
+        function buscar(by, value) {
+            switch (by) {
+                case 'id': return Array.prototype.slice.call(document.querySelectorAll('[id="' + value + '"]'));
+                case 'name': return Array.prototype.slice.call(document.getElementsByName(value));
+                case 'class name': return Array.prototype.slice.call(document.getElementsByClassName(value));
+                case 'tag name': return Array.prototype.slice.call(document.getElementsByTagName(value));
+                case 'link text':
+                case 'partial link text':
+                    return Array.prototype.filter.call(document.getElementsByTagName('a'), function (a) {
+                        var texto = a.innerText.trim();
+                        return by === 'link text' ? texto === value : texto.indexOf(value) !== -1;
+                    });
+                case 'xpath':
+                    var nodos = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null), lista = [];
+                    for (var i = 0; i < nodos.snapshotLength; i++) { lista.push(nodos.snapshotItem(i)); }
+                    return lista;
+                default: return Array.prototype.slice.call(document.querySelectorAll(value));
+            }
+        }
+        function visible(el) {
+            var estilo = window.getComputedStyle(el);
+            return estilo.visibility !== 'hidden' && estilo.display !== 'none' && el.getClientRects().length > 0;
+        }
+    """
+    
+    # Evalúa un lote de locators en el navegador y retorna su estado en un solo round trip
+    SNAPSHOT_SCRIPT = FINDER_SCRIPT + """
+        var locators = arguments[0], atributos = arguments[1], resultado = {};
+        Object.keys(locators).forEach(function (nombre) {
+            var elementos = buscar(locators[nombre][0], locators[nombre][1]), primero = elementos[0], attrs = {};
+            if (primero) {
+                atributos.forEach(function (attr) { attrs[attr] = primero.getAttribute(attr); });
+            }
+            resultado[nombre] = {
+                present: !!primero,
+                visible: !!primero && visible(primero),
+                count: elementos.length,
+                text: primero ? primero.innerText.trim() : null,
+                texts: elementos.map(function (el) { return el.innerText.trim(); }),
+                attributes: attrs
+            };
+        });
+        return resultado;
+    """
+    
+    # Condición de espera: retorna el elemento (o true para 'absent') si se cumple, null si no
+    CONDITION_SCRIPT = FINDER_SCRIPT + """
+        function evaluar(by, value, condicion) {
+            var el = buscar(by, value)[0];
+            switch (condicion) {
+                case 'present': return el || null;
+                case 'visible': return el && visible(el) ? el : null;
+                case 'clickable': return el && visible(el) && !el.disabled ? el : null;
+                case 'absent': return !el || !visible(el) ? true : null;
+            }
+            return null;
+        }
+    """
+    
+    # Espera en la página: MutationObserver + chequeo de respaldo (las transiciones CSS no generan mutaciones)
+    OBSERVER_SCRIPT = CONDITION_SCRIPT + """
+        var by = arguments[0], value = arguments[1], condicion = arguments[2], timeoutMs = arguments[3];
+        var done = arguments[arguments.length - 1];
+        var inicial = evaluar(by, value, condicion);
+        if (inicial) { return done(inicial); }
+        var terminado = false, observer, intervalo, limite;
+        function terminar(valor) {
+            if (terminado) { return; }
+            terminado = true;
+            observer.disconnect();
+            clearInterval(intervalo);
+            clearTimeout(limite);
+            done(valor);
+        }
+        function chequear() {
+            var r = evaluar(by, value, condicion);
+            if (r) { terminar(r); }
+        }
+        observer = new MutationObserver(chequear);
+        observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+        intervalo = setInterval(chequear, 100);
+        limite = setTimeout(function () { terminar(null); }, timeoutMs);
+    """
+    
+    POLL_SCRIPT = CONDITION_SCRIPT + """
+        return evaluar(arguments[0], arguments[1], arguments[2]);
+    """
+    
+    # Equivalentes de Selenium para WAIT_STRATEGY=selenium (polling fijo de 0.5s)
+    EC_CONDITIONS = {
+        "present": EC.presence_of_element_located,
+        "visible": EC.visibility_of_element_located,
+        "clickable": EC.element_to_be_clickable,
+        "absent": EC.invisibility_of_element_located,
+    }
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _instrumentar_metodos(cls)
+    
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, self.DEFAULT_TIMEOUT)
         self.logger = get_logger(self.__class__.__name__)
     
+    def wait_for(self, locator, condition="present", timeout=None):
+        """
+        Espera a que un locator cumpla una condición: present, visible, clickable o absent.
+        La estrategia sale de WAIT_STRATEGY: observer (MutationObserver en la página),
+        polling (adaptativo exponencial) o selenium (WebDriverWait clásico).
+        Registra la duración real de la espera frente a su timeout.
+        
+        Returns:
+            El WebElement (o True para 'absent')
+            
+        Raises:
+            TimeoutException: Si la condición no se cumple a tiempo
+        """
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        estrategia = config.WAIT_STRATEGY
+        inicio = time.perf_counter()
+        resultado = None
+        
+        try:
+            if estrategia == "selenium":
+                resultado = WebDriverWait(self.driver, timeout).until(self.EC_CONDITIONS[condition](locator))
+            else:
+                if estrategia == "observer":
+                    resultado = self._wait_observer(locator, condition, timeout)
+                if resultado is None:
+                    restante = max(timeout - (time.perf_counter() - inicio), 0)
+                    resultado = self.wait_until(
+                        lambda d: self._evaluar_condicion(locator, condition),
+                        timeout=restante,
+                        message=f"{condition}: {locator}",
+                        record=False
+                    )
+            if condition != "absent":
+                locator_registry.put(self.driver, locator, resultado)
+            return resultado
+        
+        finally:
+            self._registrar_espera(str(locator), condition, estrategia, time.perf_counter() - inicio, timeout, resultado is not None)
+    
+    def wait_until(self, predicate, timeout=None, message="", record=True):
+        """
+        Polling adaptativo de un predicado arbitrario (predicate(driver)):
+        intervalo inicial corto que crece exponencialmente hasta POLL_MAX.
+        
+        Raises:
+            TimeoutException: Si el predicado no retorna un valor verdadero a tiempo
+        """
+        timeout = self.DEFAULT_TIMEOUT if timeout is None else timeout
+        inicio = time.perf_counter()
+        limite = inicio + timeout
+        intervalo = self.POLL_INITIAL
+        valor = None
+        
+        try:
+            while True:
+                try:
+                    valor = predicate(self.driver)
+                    if valor:
+                        return valor
+                except (NoSuchElementException, StaleElementReferenceException):
+                    pass
+                
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    valor = None
+                    raise TimeoutException(f"Timeout tras {timeout:.1f}s esperando {message}".strip())
+                time.sleep(min(intervalo, restante))
+                intervalo = min(intervalo * self.POLL_FACTOR, self.POLL_MAX)
+        
+        finally:
+            if record:
+                self._registrar_espera(message or "predicado", "custom", "polling", time.perf_counter() - inicio, timeout, bool(valor))
+    
+    def _registrar_espera(self, descripcion, condicion, estrategia, duracion, timeout, exito):
+        """Registra la espera y avisa si su duración real superó el timeout declarado"""
+        registro = wait_metrics.record(descripcion, condicion, estrategia, duracion, timeout, exito)
+        self.logger.debug("Espera %s %s: %.0f ms de %ss (%s)", condicion, descripcion, duracion * 1000, timeout, estrategia)
+        if registro["excedida"]:
+            self.logger.warning(
+                f"Espera {condicion} {descripcion} tardó {duracion:.2f}s con timeout declarado de {timeout}s "
+                f"(¿wait implícito apilado? WAIT_POLICY={config.WAIT_POLICY})"
+            )
+    
+    def is_element_absent(self, locator, timeout=None):
+        """
+        Verifica que un elemento no esté presente/visible.
+        Chequeo inmediato en un round trip; solo espera (hasta timeout, por defecto 0)
+        si el elemento todavía está visible.
+        """
+        timeout = timeout or 0
+        try:
+            self.wait_for(locator, "absent", timeout)
+            return True
+        except TimeoutException:
+            return False
+    
+    def assert_absent(self, locator, timeout=None, message=None):
+        """
+        Falla si el elemento sigue visible tras el timeout (por defecto 0: chequeo inmediato).
+        El mensaje de error incluye el tiempo real que tomó la verificación.
+        """
+        inicio = time.perf_counter()
+        if not self.is_element_absent(locator, timeout):
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            raise AssertionError(message or f"Elemento {locator} sigue visible tras {duracion_ms:.0f} ms")
+    
+    def wait_for_url(self, fragment, timeout=None):
+        """Espera a que la URL actual contenga el fragmento indicado"""
+        return self.wait_until(lambda d: fragment in d.current_url, timeout, message=f"url contiene '{fragment}'")
+    
+    def _evaluar_condicion(self, locator, condition):
+        """Un chequeo de la condición en la página; None si no se cumple o la página está navegando"""
+        try:
+            return self.driver.execute_script(self.POLL_SCRIPT, locator[0], locator[1], condition)
+        except WebDriverException:
+            return None
+    
+    def _wait_observer(self, locator, condition, timeout):
+        """
+        Espera dentro del navegador con execute_async_script.
+        Retorna None si el script se interrumpe (p.ej. por una navegación) para continuar con polling.
+        """
+        if _script_timeouts.get(self.driver, 0) < timeout + 1:
+            self.driver.set_script_timeout(timeout + 1)
+            _script_timeouts[self.driver] = timeout + 1
+        
+        try:
+            resultado = self.driver.execute_async_script(
+                self.OBSERVER_SCRIPT, locator[0], locator[1], condition, int(timeout * 1000)
+            )
+        except TimeoutException:
+            raise
+        except WebDriverException as e:
+            self.logger.debug("Espera vía observer interrumpida, continuando con polling: %s", e.msg)
+            return None
+        
+        if resultado is None:
+            raise TimeoutException(f"Timeout tras {timeout:.1f}s esperando {condition}: {locator}")
+        return resultado
+    
     def find_element(self, locator, timeout=None):
-        """Encuentra un elemento con espera explícita"""
+        """Encuentra un elemento con espera explícita (o lo toma del registro si ya se resolvió en esta página)"""
+        elemento = locator_registry.get(self.driver, locator)
+        if elemento is not None:
+            return elemento
+        
         timeout = timeout or self.DEFAULT_TIMEOUT
         try:
-            self.logger.debug(f"Buscando elemento: {locator}")
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-            return element
+            self.logger.debug("Buscando elemento: %s", locator)
+            return self.wait_for(locator, "present", timeout)
         except TimeoutException:
             self.logger.error(f"Timeout al buscar: {locator}")
             raise
     
+    def _usar_elemento(self, locator, accion, timeout=None):
+        """Aplica accion(elemento); si el elemento del registro quedó obsoleto lo resuelve de nuevo una vez"""
+        try:
+            return accion(self.find_element(locator, timeout))
+        except StaleElementReferenceException:
+            locator_registry.discard(self.driver, locator, obsoleto=True)
+            return accion(self.find_element(locator, timeout))
+    
+    @_cambia_pagina
     def click_element(self, locator, timeout=None):
         """Click en elemento esperando que sea clickeable"""
         timeout = timeout or self.DEFAULT_TIMEOUT
         try:
-            self.logger.debug(f"Click en: {locator}")
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable(locator)
-            )
+            self.logger.debug("Click en: %s", locator)
+            element = self.wait_for(locator, "clickable", timeout)
             # Scroll al elemento para asegurar visibilidad
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
             element.click()
@@ -48,10 +470,8 @@ class BasePage:
         """Envía texto a un elemento"""
         timeout = timeout or self.DEFAULT_TIMEOUT
         try:
-            self.logger.debug(f"Enviando texto a: {locator}")
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
+            self.logger.debug("Enviando texto a: %s", locator)
+            element = self.wait_for(locator, "visible", timeout)
             element.clear()
             element.send_keys(text)
         except TimeoutException:
@@ -62,18 +482,37 @@ class BasePage:
         """Verifica si un elemento es visible"""
         timeout = timeout or self.SHORT_TIMEOUT
         try:
-            WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
+            self.wait_for(locator, "visible", timeout)
             return True
         except TimeoutException:
             return False
     
     def get_element_text(self, locator, timeout=None):
-        """Obtiene el texto de un elemento"""
+        """Obtiene el texto de un elemento (sin volver a buscarlo si una espera previa ya lo resolvió)"""
         timeout = timeout or self.DEFAULT_TIMEOUT
-        element = self.find_element(locator, timeout)
-        return element.text
+        return self._usar_elemento(locator, lambda element: element.text, timeout)
+    
+    def snapshot(self, locators, attributes=()):
+        """
+        Lee el estado de varios locators con un único execute_script.
+        
+        Args:
+            locators: Dict nombre -> locator (By, valor)
+            attributes: Atributos a leer del primer elemento de cada locator
+            
+        Returns:
+            Dict nombre -> {present, visible, count, text, texts, attributes}
+        """
+        resultado = self.driver.execute_script(
+            self.SNAPSHOT_SCRIPT,
+            {nombre: list(locator) for nombre, locator in locators.items()},
+            list(attributes)
+        )
+        self.logger.debug("Snapshot de %d locator(s)", len(locators))
+        return resultado
+
+
+_instrumentar_metodos(BasePage)
 
 
 class LoginPage(BasePage):
@@ -86,11 +525,18 @@ class LoginPage(BasePage):
     LOGIN_BTN = (By.ID, "login-button")
     ERROR_MSG = (By.CSS_SELECTOR, "h3[data-test='error']")
     
+    INVENTORY_PATH = "inventory.html"
+    CART_STORAGE_KEY = "cart-contents"
+    COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+    
+    @_cambia_pagina
     def navigate(self):
         """Navegar a la página de login"""
         self.logger.info(f"Navegando a {self.URL}")
         self.driver.get(self.URL)
-        self.logger.debug(f"URL actual: {self.driver.current_url}")
+        # current_url es un round trip a WebDriver: solo se consulta si el debug está habilitado
+        if self.logger.is_enabled_for(logging.DEBUG):
+            self.logger.debug("URL actual: %s", self.driver.current_url)
     
     def login(self, username, password):
         """Realizar login"""
@@ -122,6 +568,58 @@ class LoginPage(BasePage):
     def is_error_displayed(self):
         """Verificar si hay error visible"""
         return self.is_element_visible(self.ERROR_MSG)
+    
+    def capture_session_state(self):
+        """
+        Captura el estado de sesión tras un login real: cookies del dominio
+        y localStorage (sin el carrito, para que la inyección arranque vacía).
+        """
+        local_storage = self.driver.execute_script(
+            "var estado = {};"
+            "for (var i = 0; i < localStorage.length; i++) {"
+            "  var key = localStorage.key(i);"
+            "  if (key !== arguments[0]) { estado[key] = localStorage.getItem(key); }"
+            "}"
+            "return estado;",
+            self.CART_STORAGE_KEY
+        )
+        state = {
+            "cookies": self.driver.get_cookies(),
+            "local_storage": local_storage or {}
+        }
+        self.logger.debug("Estado de sesión capturado: %d cookie(s)", len(state["cookies"]))
+        return state
+    
+    @_cambia_pagina
+    def inject_session_state(self, state):
+        """
+        Autentica sin pasar por el formulario: inyecta cookies y localStorage
+        capturados previamente y navega directo al inventario.
+        Retorna False si el estado no sirve (vencido, vacío o rechazado por la app).
+        """
+        cookies = state.get("cookies") if state else None
+        if not cookies:
+            return False
+        
+        ahora = time.time()
+        if any(cookie.get("expiry") and cookie["expiry"] <= ahora for cookie in cookies):
+            self.logger.info("Estado de sesión vencido, se requiere login por formulario")
+            return False
+        
+        # Las cookies solo se pueden agregar estando en el dominio de la app
+        self.navigate()
+        for cookie in cookies:
+            self.driver.add_cookie({k: v for k, v in cookie.items() if k in self.COOKIE_FIELDS})
+        self.driver.execute_script(
+            "var estado = arguments[0];"
+            "Object.keys(estado).forEach(function (key) { localStorage.setItem(key, estado[key]); });",
+            state.get("local_storage", {})
+        )
+        
+        self.driver.get(self.URL + self.INVENTORY_PATH)
+        autenticado = self.INVENTORY_PATH in self.driver.current_url
+        self.logger.info(f"Login vía inyección de estado: {'OK' if autenticado else 'rechazado'}")
+        return autenticado
 
 
 class InventoryPage(BasePage):
@@ -135,6 +633,20 @@ class InventoryPage(BasePage):
     CLOSE_MENU_BTN = (By.ID, "react-burger-cross-btn")
     MENU_ITEMS = (By.CLASS_NAME, "bm-item-list")
     
+    # Click de varios botones add-to-cart en una sola pasada; valida todos los ids antes de clickear
+    ADD_TO_CART_SCRIPT = """
+        var ids = arguments[0], botones = [], faltantes = [];
+        ids.forEach(function (id) {
+            var boton = document.getElementById(id);
+            if (boton && !boton.disabled) { botones.push(boton); } else { faltantes.push(id); }
+        });
+        var badge = document.querySelector('.shopping_cart_badge');
+        var inicial = badge ? parseInt(badge.innerText, 10) : 0;
+        if (faltantes.length) { return {inicial: inicial, agregados: 0, faltantes: faltantes}; }
+        botones.forEach(function (boton) { boton.click(); });
+        return {inicial: inicial, agregados: botones.length, faltantes: []};
+    """
+    
     def is_loaded(self):
         """Verificar que la página está cargada"""
         self.logger.debug("Verificando carga de inventario")
@@ -148,24 +660,53 @@ class InventoryPage(BasePage):
         self.logger.info(f"Agregando producto: {product_id}")
         self.click_element(locator)
     
+    @_cambia_pagina
+    def add_products_to_cart(self, product_ids, timeout=None):
+        """
+        Agrega varios productos al carrito con un único execute_script y verifica
+        el badge final una sola vez (en lugar de click + espera por producto).
+        
+        Args:
+            product_ids: IDs de los botones add-to-cart (los repetidos se agregan una sola vez)
+            timeout: Tiempo máximo de espera del badge
+            
+        Returns:
+            Cantidad de items en el carrito tras agregarlos
+            
+        Raises:
+            NoSuchElementException: Si algún botón no está en la página (no se agrega ninguno)
+            AssertionError: Si el badge no alcanza la cantidad esperada
+        """
+        # Un id repetido clickearía dos veces el mismo botón ("Add" -> "Remove"): se agrega una vez
+        product_ids = list(dict.fromkeys(product_ids))
+        self.logger.info(f"Agregando {len(product_ids)} producto(s) en lote")
+        
+        self.wait_for(self.INVENTORY, "present", timeout)
+        resultado = self.driver.execute_script(self.ADD_TO_CART_SCRIPT, product_ids)
+        if resultado["faltantes"]:
+            error_msg = f"Botones add-to-cart no disponibles: {', '.join(resultado['faltantes'])}"
+            self.logger.error(error_msg)
+            raise NoSuchElementException(error_msg)
+        
+        esperado = resultado["inicial"] + resultado["agregados"]
+        self.wait_for_cart_count(esperado, timeout or self.DEFAULT_TIMEOUT)
+        return esperado
+    
     def add_backpack_to_cart(self):
         """Agregar mochila al carrito (producto más usado en tests)"""
         self.add_product_to_cart_by_id("add-to-cart-sauce-labs-backpack")
     
     def get_cart_count(self):
-        """Obtener cantidad de items en carrito"""
+        """Obtener cantidad de items en carrito (una sola lectura del badge)"""
         try:
-            badge = self.wait.until(
-                EC.visibility_of_element_located(self.CART_BADGE)
-            )
-            badge_text = badge.text
-            count = int(badge_text)
-            self.logger.debug(f"Items en carrito: {count}")
-            return count
+            badge = self.snapshot({"badge": self.CART_BADGE})["badge"]
+            if not badge["visible"]:
+                self.logger.debug("Carrito vacío (Badge no encontrado)")
+                return 0
             
-        except TimeoutException:
-            self.logger.debug("Carrito vacío (Badge no encontrado)")
-            return 0
+            count = int(badge["text"])
+            self.logger.debug("Items en carrito: %d", count)
+            return count
             
         except Exception as e:
             self.logger.error(f"Error inesperado al obtener conteo del carrito: {str(e)}")
@@ -175,6 +716,7 @@ class InventoryPage(BasePage):
         """
         Espera a que el carrito tenga el número esperado de items.
         Helper para evitar duplicación de código en tests.
+        Cada chequeo es un único snapshot del badge (un round trip).
         
         Args:
             expected_count: Número esperado de items
@@ -183,12 +725,15 @@ class InventoryPage(BasePage):
         Raises:
             AssertionError: Si no se alcanza el conteo esperado
         """
-        self.logger.debug(f"Esperando que carrito tenga {expected_count} items...")
+        self.logger.debug("Esperando que carrito tenga %s items...", expected_count)
+        esperado = str(expected_count)
+        
+        def badge_actualizado(driver):
+            badge = self.snapshot({"badge": self.CART_BADGE})["badge"]
+            return badge["visible"] and badge["text"] == esperado
+        
         try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda d: d.find_element(*self.CART_BADGE).is_displayed() and 
-                         d.find_element(*self.CART_BADGE).text == str(expected_count)
-            )
+            self.wait_until(badge_actualizado, timeout, message=f"carrito con {expected_count} items")
             self.logger.info(f"Carrito actualizado a {expected_count} items")
             return True
         except TimeoutException:
@@ -202,89 +747,99 @@ class InventoryPage(BasePage):
         self.logger.info("Navegando al carrito")
         self.click_element(self.CART_LINK)
 
+    @_cambia_pagina
     def reset_app_state(self):
         """
         Resetea el estado de la aplicación limpiando el carrito.
-        Implementa múltiples estrategias de respaldo.
+        Estrategia rápida: un único script que borra el carrito de localStorage y recarga
+        (si ya estaba vacío no hace nada). Respaldos verificados: menú hamburguesa y recarga.
+        Registra qué estrategia corrió y cuánto tardó en reset_metrics.
         """
         self.logger.info("Reseteando estado de la aplicación")
         
         try:
-            # Verificar si el carrito ya está vacío
-            cart_count = self.get_cart_count()
-            if cart_count == 0:
-                self.logger.info("Carrito ya está vacío")
-                return
-            
-            self.logger.info(f"Carrito tiene {cart_count} items, procediendo a resetear...")
-            
-            # Estrategia 1: Reset vía menú hamburguesa
-            try:
-                self._reset_via_menu()
+            estrategias = (
+                ("storage", self._reset_via_storage),
+                ("menu", self._reset_via_menu),
+                ("recarga", self._reset_via_refresh),
+            )
+            for nombre, estrategia in estrategias:
+                inicio = time.perf_counter()
+                exito = False
+                try:
+                    with span_recorder.span(f"reset.{nombre}"):
+                        estrategia()
+                        exito = self._verificar_carrito_vacio()
+                except Exception as error:
+                    self.logger.warning(f"Reset vía {nombre} falló: {error}")
                 
-                # Verificar que funcionó
-                WebDriverWait(self.driver, self.SHORT_TIMEOUT).until(
-                    lambda d: self.get_cart_count() == 0
-                )
-                new_count = self.get_cart_count()
-                if new_count == 0:
-                    self.logger.info("Reset exitoso vía menú")
+                duracion = time.perf_counter() - inicio
+                reset_metrics.record(nombre, duracion, exito)
+                if exito:
+                    self.logger.info(f"Reset exitoso vía {nombre} en {duracion * 1000:.0f} ms")
                     return
-                else:
-                    self.logger.warning(f"Reset vía menú parcial ({new_count} items restantes)")
-            
-            except Exception as menu_error:
-                self.logger.warning(f"Reset vía menú falló: {menu_error}")
-            
-            # Estrategia 2: Recarga de página
-            self.logger.info("Intentando reset vía recarga de página...")
-            self.driver.refresh()
-            
-            WebDriverWait(self.driver, self.DEFAULT_TIMEOUT).until(
-                EC.presence_of_element_located(self.INVENTORY)
-            )
+                self.logger.warning(f"Reset vía {nombre} no vació el carrito, probando siguiente estrategia")
             
-            final_count = self.get_cart_count()
-            if final_count == 0:
-                self.logger.info("Reset exitoso vía recarga")
-            else:
-                self.logger.error(f"No se pudo vaciar el carrito ({final_count} items)")
+            self.logger.error(f"No se pudo vaciar el carrito ({self.get_cart_count()} items)")
         
         except Exception as e:
             self.logger.error(f"Error crítico en reset_app_state: {str(e)}")
-
+    
+    def _verificar_carrito_vacio(self):
+        """Tras un reset: badge ausente y el inventario presente (espera la recarga si la hubo)"""
+        if not self.is_element_absent(self.CART_BADGE, timeout=self.SHORT_TIMEOUT):
+            return False
+        self.wait_for(self.INVENTORY, "present", self.DEFAULT_TIMEOUT)
+        return True
+    
+    def _reset_via_storage(self):
+        """
+        Un round trip: si el carrito tiene items borra su clave de localStorage y recarga
+        la página para que la app se re-renderice sin ellos.
+        """
+        items = self.driver.execute_script(
+            "var badge = document.querySelector('.shopping_cart_badge');"
+            "var guardado = localStorage.getItem(arguments[0]);"
+            "if (!badge && (!guardado || guardado === '[]')) { return 0; }"
+            "localStorage.removeItem(arguments[0]);"
+            "location.reload();"
+            "return badge ? parseInt(badge.innerText, 10) : -1;",
+            LoginPage.CART_STORAGE_KEY
+        )
+        if items:
+            self.logger.debug("Carrito borrado de localStorage (%s items), recargando", items)
+        else:
+            self.logger.info("Carrito ya está vacío")
+    
+    def _reset_via_refresh(self):
+        """Último recurso: recargar la página"""
+        self.logger.info("Intentando reset vía recarga de página...")
+        self.driver.refresh()
+    
     def _reset_via_menu(self):
         """Método auxiliar para resetear vía menú hamburguesa"""
         self.logger.debug("Ejecutando reset vía menú...")
         
-        # Verificar si el menú ya está abierto
-        menu_abierto = self.is_element_visible(self.RESET_APP_STATE_LINK, timeout=1)
+        # Verificar si el menú ya está abierto (lectura inmediata, sin esperar)
+        menu_abierto = not self.is_element_absent(self.RESET_APP_STATE_LINK)
         
         if not menu_abierto:
             self.logger.debug("Abriendo menú hamburguesa")
-            burger_btn = WebDriverWait(self.driver, self.SHORT_TIMEOUT).until(
-                EC.element_to_be_clickable(self.BURGER_MENU_BTN)
-            )
+            burger_btn = self.wait_for(self.BURGER_MENU_BTN, "clickable", self.SHORT_TIMEOUT)
             burger_btn.click()
             
             self.logger.debug("Esperando apertura del menú...")
-            WebDriverWait(self.driver, self.SHORT_TIMEOUT).until(
-                EC.visibility_of_element_located(self.MENU_ITEMS)
-            )
+            self.wait_for(self.MENU_ITEMS, "visible", self.SHORT_TIMEOUT)
         
         # Click en reset
         self.logger.debug("Haciendo click en Reset App State")
-        reset_link = WebDriverWait(self.driver, self.SHORT_TIMEOUT).until(
-            EC.element_to_be_clickable(self.RESET_APP_STATE_LINK)
-        )
+        reset_link = self.wait_for(self.RESET_APP_STATE_LINK, "clickable", self.SHORT_TIMEOUT)
         reset_link.click()
         
         # Cerrar menú
-        if self.is_element_visible(self.CLOSE_MENU_BTN, timeout=2):
+        if not self.is_element_absent(self.CLOSE_MENU_BTN):
             self.logger.debug("Cerrando menú")
-            close_btn = WebDriverWait(self.driver, self.SHORT_TIMEOUT).until(
-                EC.element_to_be_clickable(self.CLOSE_MENU_BTN)
-            )
+            close_btn = self.wait_for(self.CLOSE_MENU_BTN, "clickable", self.SHORT_TIMEOUT)
             close_btn.click()
         
         self.logger.debug("Reset vía menú completado")
@@ -297,47 +852,81 @@ class CartPage(BasePage):
     CART_ITEMS = (By.CLASS_NAME, "cart_item")
     CHECKOUT_BTN = (By.ID, "checkout")
     ITEM_NAME = (By.CLASS_NAME, "inventory_item_name")
+    ITEM_NAMES = (By.CSS_SELECTOR, ".cart_item .inventory_item_name")
+    
+    # Nombre, precio y cantidad de cada item del carrito en un único round trip
+    ITEMS_SCRIPT = """
+        return Array.prototype.map.call(document.querySelectorAll('.cart_item'), function (item) {
+            function texto(selector) {
+                var el = item.querySelector(selector);
+                return el ? el.innerText.trim() : '';
+            }
+            return {
+                nombre: texto('.inventory_item_name'),
+                precio: parseFloat(texto('.inventory_item_price').replace(/[^0-9.]/g, '')) || 0,
+                cantidad: parseInt(texto('.cart_quantity'), 10) || 0
+            };
+        });
+    """
     
     def is_loaded(self):
         """Verificar que el carrito está cargado"""
         is_loaded = self.is_element_visible(self.CART_CONTAINER, timeout=self.DEFAULT_TIMEOUT)
-        self.logger.debug(f"Carrito cargado: {is_loaded}")
+        self.logger.debug("Carrito cargado: %s", is_loaded)
         return is_loaded
     
     def get_items_count(self):
         """Obtener cantidad de items en el carrito"""
         try:
-            self.wait.until(EC.visibility_of_element_located(self.CART_CONTAINER))
-            self.wait.until(EC.presence_of_all_elements_located(self.CART_ITEMS))
-            items = self.driver.find_elements(*self.CART_ITEMS)
-            count = len(items)
+            self.wait_until(lambda d: self._cart_snapshot()["items"]["count"] > 0, message="items del carrito")
+            count = self._cart_snapshot()["items"]["count"]
             self.logger.info(f"Items en carrito: {count}")
             return count
         except:
             return 0
     
     def get_item_names(self):
-        """Obtener nombres de productos en el carrito"""
+        """Obtener nombres de productos en el carrito (un round trip por lectura)"""
         self.logger.debug("Obteniendo nombres de productos")
         names = []
         
         try:
-            items = self.wait.until(
-                EC.visibility_of_all_elements_located(self.CART_ITEMS)
-            )
-            
-            for item in items:
-                try:
-                    name = item.find_element(*self.ITEM_NAME).text
-                    names.append(name)
-                    self.logger.debug(f"  - {name}")
-                except NoSuchElementException:
-                    self.logger.warning("No se pudo encontrar el nombre de un item")
+            self.wait_until(lambda d: self._cart_snapshot()["items"]["visible"], message="items del carrito visibles")
+            names = self._cart_snapshot()["names"]["texts"]
+            for name in names:
+                self.logger.debug("  - %s", name)
         except Exception as e:
             self.logger.warning(f"Error al obtener nombres: {e}")
         
         return names
     
+    def get_items(self, expected_count=None, timeout=None):
+        """
+        Lee todos los items del carrito (nombre, precio, cantidad) con un único execute_script.
+        
+        Args:
+            expected_count: Si se indica, reintenta la lectura hasta que haya esa cantidad de items
+            timeout: Tiempo máximo de espera
+            
+        Returns:
+            Lista de dicts {nombre, precio, cantidad}
+        """
+        items = self.driver.execute_script(self.ITEMS_SCRIPT)
+        
+        if expected_count is not None and len(items) != expected_count:
+            def cantidad_alcanzada(driver):
+                nonlocal items
+                items = driver.execute_script(self.ITEMS_SCRIPT)
+                return len(items) == expected_count
+            
+            self.wait_until(cantidad_alcanzada, timeout, message=f"{expected_count} items en el carrito")
+        
+        self.logger.debug("Items leídos del carrito: %d", len(items))
+        return items
+    
+    def _cart_snapshot(self):
+        return self.snapshot({"items": self.CART_ITEMS, "names": self.ITEM_NAMES})
+    
     def checkout(self):
         """Ir a checkout"""
         self.logger.info("Iniciando checkout")
@@ -360,7 +949,7 @@ class CheckoutPage(BasePage):
     def is_loaded(self):
         """Verificar que el checkout está cargado"""
         is_loaded = self.is_element_visible(self.CHECKOUT_INFO, timeout=self.DEFAULT_TIMEOUT)
-        self.logger.debug(f"Checkout cargado: {is_loaded}")
+        self.logger.debug("Checkout cargado: %s", is_loaded)
         return is_loaded
     
     def fill_information(self, first_name, last_name, zip_code):
@@ -391,7 +980,7 @@ class CheckoutPage(BasePage):
     def is_checkout_complete(self):
         """Verificar si checkout se completó"""
         is_complete = self.is_element_visible(self.COMPLETE_CONTAINER, timeout=self.DEFAULT_TIMEOUT)
-        self.logger.debug(f"Checkout completo: {is_complete}")
+        self.logger.debug("Checkout completo: %s", is_complete)
         return is_complete
 
     def get_error_message(self):
@@ -0,0 +1,225 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from utils import get_logger, get_worker_id, config
+
+logger = get_logger(__name__)
+
+
+MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+class ScreenshotPipeline:
+    """
+    Pipeline de screenshots en segundo plano con almacenamiento direccionado por contenido.
+    El thread del test solo obtiene los bytes PNG del navegador (get_screenshot_as_png) y
+    calcula su hash; un worker thread los recomprime opcionalmente (Pillow), los escribe
+    como screenshots/objects/<sha256>.<ext> y arma el data URI para el reporte.
+    Imágenes idénticas (captura del test + del fixture, reruns) se guardan una sola vez;
+    el manifest registra qué test/paso produjo cada hash.
+    """
+
+    def __init__(self, formato=None, calidad=None, max_width=None, base_dir=None):
+        self.formato = (formato or config.SCREENSHOT_FORMAT).lower()
+        self.thumbnail_width = config.SCREENSHOT_THUMBNAIL_WIDTH
+        self.calidad = calidad or config.SCREENSHOT_QUALITY
+        self.max_width = config.SCREENSHOT_MAX_WIDTH if max_width is None else max_width
+        self.base_dir = Path(base_dir or config.SCREENSHOTS_DIR)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshots")
+        self._lock = threading.Lock()
+        self._pendientes = []
+        self._vistos = set()
+        self.manifest = []
+
+        if self.formato not in MIME_TYPES:
+            logger.warning(f"Formato de screenshot desconocido '{self.formato}', usando png")
+            self.formato = "png"
+
+        try:
+            import PIL  # noqa: F401
+            self.pillow = True
+        except ImportError:
+            self.pillow = False
+            if self.formato != "png" or self.max_width:
+                logger.warning("Pillow no instalado: screenshots se guardan como PNG sin recomprimir")
+                self.formato, self.max_width = "png", 0
+
+    def capture(self, driver, test_name, paso="", report_mode="embed"):
+        """
+        Toma la screenshot (único paso bloqueante) y encola su procesamiento.
+        report_mode="embed" prepara el data URI completo; "link" solo una miniatura
+        (requiere Pillow) para enlazar la imagen en disco desde el reporte; None, ninguno
+        de los dos (captura sin extra en el reporte, p. ej. capturar_pantalla).
+
+        Returns:
+            Future cuyo resultado es un dict con path, hash, mime, bytes, repetida,
+            data_uri (None si no se embebe o la imagen ya se había procesado) y thumbnail_uri
+        """
+        return self.submit(driver.get_screenshot_as_png(), test_name, paso, report_mode)
+
+    def submit(self, png_bytes, test_name, paso="", report_mode="embed"):
+        """Registra la captura en el manifest y encola su procesamiento (future.path = ruta del objeto)"""
+        digest = hashlib.sha256(png_bytes).hexdigest()
+        filepath = self.object_path(digest)
+
+        with self._lock:
+            repetida = digest in self._vistos
+            self._vistos.add(digest)
+            self.manifest.append({
+                "test": test_name,
+                "paso": paso,
+                "hash": digest,
+                "path": filepath.as_posix(),
+                "worker": get_worker_id(),
+                "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            })
+
+            future = self._executor.submit(self._procesar, png_bytes, digest, filepath, repetida, report_mode)
+            # La ruta final se conoce de inmediato (nombre = hash), antes de escribir el archivo
+            future.path = str(filepath)
+            future.report_mode = report_mode
+            self._pendientes = [f for f in self._pendientes if not f.done()]
+            self._pendientes.append(future)
+        return future
+
+    def object_path(self, digest):
+        """Ruta del objeto para un hash (compartida por todos los workers)"""
+        return self.base_dir / "objects" / f"{digest}.{self.formato}"
+
+    def _procesar(self, png_bytes, digest, filepath, repetida, report_mode="embed"):
+        if repetida:
+            data = None
+        elif filepath.exists():
+            # Ya guardada por otro worker o una corrida anterior: no se recomprime
+            # (y solo se lee si hay que embeberla)
+            data = filepath.read_bytes() if report_mode == "embed" else None
+        else:
+            data = self._recomprimir(png_bytes)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = filepath.with_name(f"{filepath.name}.{get_worker_id()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, filepath)
+            logger.debug("Screenshot guardada: %s (%.0f KB)", filepath, len(data) / 1024)
+
+        mime = MIME_TYPES[self.formato]
+        embeber = data and report_mode == "embed"
+        return {
+            "path": str(filepath),
+            "hash": digest,
+            "mime": mime,
+            "bytes": filepath.stat().st_size,
+            "repetida": repetida,
+            "data_uri": f"data:{mime};base64,{base64.b64encode(data).decode()}" if embeber else None,
+            "thumbnail_uri": self._miniatura(png_bytes) if report_mode == "link" else None,
+        }
+
+    def _miniatura(self, png_bytes):
+        """Miniatura JPEG como data URI para el modo link (None sin Pillow)"""
+        if not self.pillow:
+            return None
+
+        from PIL import Image
+
+        imagen = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+        imagen.thumbnail((self.thumbnail_width, self.thumbnail_width * 4))
+        salida = io.BytesIO()
+        imagen.save(salida, format="JPEG", quality=70)
+        return f"data:image/jpeg;base64,{base64.b64encode(salida.getvalue()).decode()}"
+
+    def _recomprimir(self, png_bytes):
+        """Reduce/recomprime con Pillow si está configurado (PNG sin reducir se guarda tal cual)"""
+        if self.formato == "png" and not self.max_width:
+            return png_bytes
+
+        from PIL import Image
+
+        imagen = Image.open(io.BytesIO(png_bytes))
+        if self.max_width and imagen.width > self.max_width:
+            alto = round(imagen.height * self.max_width / imagen.width)
+            imagen = imagen.resize((self.max_width, alto))
+
+        salida = io.BytesIO()
+        if self.formato == "png":
+            imagen.save(salida, format="PNG", optimize=True)
+        else:
+            if self.formato == "jpeg":
+                imagen = imagen.convert("RGB")
+            imagen.save(salida, format=self.formato.upper(), quality=self.calidad)
+        return salida.getvalue()
+
+    def flush(self, timeout=None):
+        """Espera a que terminen todas las screenshots encoladas"""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, []
+        for future in pendientes:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Screenshot en segundo plano falló: {e}")
+
+    def save_manifest(self):
+        """
+        Escribe el manifest del proceso: screenshots/manifest.json, o
+        manifest_gwN.json en workers de xdist (el proceso principal los consolida).
+        """
+        if not self.manifest:
+            return None
+
+        worker_id = get_worker_id()
+        nombre = "manifest.json" if worker_id == "master" else f"manifest_{worker_id}.json"
+        path = self.base_dir / nombre
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+        unicas = len({entrada["hash"] for entrada in self.manifest})
+        logger.info(f"Manifest de screenshots: {len(self.manifest)} captura(s), {unicas} imagen(es) única(s)")
+        return path
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self.save_manifest()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_screenshot_pipeline():
+    """Pipeline compartido del proceso (uno por worker de xdist)"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ScreenshotPipeline()
+        return _pipeline
+
+
+def consolidar_manifests_workers(base_dir=None):
+    """
+    Une los manifests por worker (manifest_gw*.json) en screenshots/manifest.json
+    ordenados por timestamp, y elimina los archivos de los workers.
+    """
+    base_dir = Path(base_dir or config.SCREENSHOTS_DIR)
+    worker_manifests = sorted(base_dir.glob("manifest_gw*.json"))
+    if not worker_manifests:
+        return 0
+
+    entradas = []
+    for path in worker_manifests:
+        with open(path, "r", encoding="utf-8") as f:
+            entradas.extend(json.load(f))
+
+    entradas.sort(key=lambda entrada: entrada["timestamp"])
+    with open(base_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(entradas, f, ensure_ascii=False, indent=2)
+
+    for path in worker_manifests:
+        path.unlink()
+    return len(worker_manifests)
@@ -1,83 +1,111 @@
 import pytest
-import requests
+from api_client import APIClient, APIBenchmark, Cassette, ResponseCache, crear_sesion_api
+from local_server import LocalJSONPlaceholderServer
+from utils import get_logger, config, estadisticas_sesion
+
+logger = get_logger(__name__)
+
+# Estadísticas de la sesión HTTP para el resumen final (lo muestra el conftest raíz)
+_API_SESSION_STATS = estadisticas_sesion.setdefault("api", {})
+
+
+@pytest.fixture(scope="session")
+def base_url(request):
+    """
+    URL base de la API.
+    Con --api-backend=local (o API_BACKEND=local) levanta el servidor local en proceso
+    en lugar de usar JSONPlaceholder por internet.
+    """
+    backend = request.config.getoption("--api-backend") or config.API_BACKEND
+
+    if backend == "local":
+        server = LocalJSONPlaceholderServer().start()
+        yield server.url
+        server.stop()
+    else:
+        yield config.JSONPLACEHOLDER_URL
 
 
 @pytest.fixture(scope="session")
-def base_url():
-    """URL base de JSONPlaceholder"""
-    return "https://jsonplaceholder.typicode.com"
+def api_session(request):
+    """
+    Sesión HTTP compartida por todos los tests de API (una por worker).
+    Mantiene el pool de conexiones keep-alive entre tests para no pagar
+    un handshake TCP+TLS nuevo en cada uno.
+    Con --api-cassette (o API_CASSETTE_MODE) graba/reproduce las respuestas.
+    """
+    cassette = Cassette(mode=request.config.getoption("--api-cassette") or config.API_CASSETTE_MODE)
+    session = crear_sesion_api(cassette=cassette if cassette.enabled else None)
+
+    yield session
+
+    stats = session.adapter.connection_stats()
+    _API_SESSION_STATS["conexiones"] = stats
+    logger.info(
+        f"Conexiones API - requests: {stats['requests']}, "
+        f"abiertas: {stats['conexiones_abiertas']}, "
+        f"reutilizadas: {stats['conexiones_reutilizadas']}"
+    )
+
+    if cassette.enabled:
+        cassette.save()
+        cassette_stats = cassette.stats()
+        _API_SESSION_STATS["cassette"] = cassette_stats
+        logger.info(
+            f"Cassette API ({cassette_stats['modo']}) - hits: {cassette_stats['hits']}, "
+            f"misses: {cassette_stats['misses']}, hit ratio: {cassette_stats['hit_ratio']:.1%}"
+        )
+
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def api_cache(request):
+    """
+    Cache de respuestas GET compartido por la sesión (opt-in con --api-cache o API_CACHE=true).
+    Retorna None si está desactivado.
+    """
+    if not (request.config.getoption("--api-cache") or config.API_CACHE_ENABLED):
+        yield None
+        return
+
+    cache = ResponseCache()
+
+    yield cache
+
+    stats = cache.stats()
+    _API_SESSION_STATS["cache"] = stats
+    logger.info(
+        f"Cache API - hits: {stats['hits']}, misses: {stats['misses']}, "
+        f"revalidaciones: {stats['revalidaciones']}, hit ratio: {stats['hit_ratio']:.1%}"
+    )
 
 
 @pytest.fixture(scope="function")
-def api_client(base_url):
+def api_client(request, base_url, api_session, api_cache):
     """
     Cliente HTTP para realizar peticiones a la API.
     Incluye métodos para GET, POST, PUT, PATCH y DELETE.
+    Cada test obtiene su propia fachada (headers aislados) sobre la sesión compartida.
+    Los tests marcados con @pytest.mark.no_api_cache no usan el cache de respuestas.
     """
-    session = requests.Session()
-    session.headers.update({
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    })
-    
-    class APIClient:
-        def __init__(self, base_url, session):
-            self.base_url = base_url
-            self.session = session
-        
-        def get(self, endpoint, **kwargs):
-            """
-            Realiza una petición GET
-            """
-            url = f"{self.base_url}{endpoint}"
-            return self.session.get(url, **kwargs)
-        
-        def post(self, endpoint, json=None):
-            """
-            Realiza una petición POST
-            """
-            url = f"{self.base_url}{endpoint}"
-            return self.session.post(url, json=json)
-        
-        def put(self, endpoint, json=None):
-            """
-            Realiza una petición PUT (reemplazo completo del recurso)
-            """
-            url = f"{self.base_url}{endpoint}"
-            return self.session.put(url, json=json)
-        
-        def patch(self, endpoint, json=None):
-            """
-            Realiza una petición PATCH (actualización parcial del recurso)
-            """
-            url = f"{self.base_url}{endpoint}"
-            return self.session.patch(url, json=json)
-        
-        def delete(self, endpoint):
-            """
-            Realiza una petición DELETE
-            """
-            url = f"{self.base_url}{endpoint}"
-            return self.session.delete(url)
-        
-        def get_all_todos(self):
-            """Helper: Obtiene todos los TODOs"""
-            return self.get("/todos")
-        
-        def get_all_posts(self):
-            """Helper: Obtiene todos los posts"""
-            return self.get("/posts")
-        
-        def get_all_users(self):
-            """Helper: Obtiene todos los usuarios"""
-            return self.get("/users")
-        
-        def get_user_posts(self, user_id):
-            """Helper: Obtiene posts de un usuario específico"""
-            return self.get(f"/users/{user_id}/posts")
-        
-        def get_post_comments(self, post_id):
-            """Helper: Obtiene comentarios de un post"""
-            return self.get(f"/posts/{post_id}/comments")
-    
-    return APIClient(base_url, session)
\ No newline at end of file
+    client = APIClient(base_url, api_session, cache=api_cache)
+    client.cache_bypass = request.node.get_closest_marker("no_api_cache") is not None
+
+    yield client
+
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def benchmark_results():
+    """
+    Acumula los resultados de los benchmarks de latencia de la sesión
+    y los exporta como JSON al finalizar.
+    """
+    resultados = []
+
+    yield resultados
+
+    if resultados:
+        APIBenchmark.export(resultados)
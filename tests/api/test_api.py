@@ -1,23 +1,17 @@
 import pytest
-import json
-from pathlib import Path
-from utils import get_logger
+import requests
+from api_client import APIBenchmark, APIClient, ResponseCache
+from utils import get_logger, api_data_loader, DataStream
 
 logger = get_logger(__name__)
 
+pytestmark = pytest.mark.api
 
-def load_api_test_data():
-    """Carga los datos de test desde test_data_api.json"""
-    data_file = Path("data/test_data_api.json")
-    if not data_file.exists():
-        raise FileNotFoundError(f"Archivo {data_file} no encontrado")
-    
-    with open(data_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
+# Datos de test_data_api.json (parseados una sola vez por proceso y compartidos)
+API_TEST_DATA = api_data_loader
 
-# Carga los datos una sola vez
-API_TEST_DATA = load_api_test_data()
+# Casos generados (JSONL): se parsean recién al ejecutar cada test; DATA_SHARD=i/n toma una porción
+TODOS_STREAM = DataStream("data/todos_generados.jsonl")
 
 
 class TestAPICRUD:
@@ -196,6 +190,39 @@ class TestAPICRUD:
             raise
 
 
+    @pytest.mark.parametrize("caso", TODOS_STREAM.casos(), ids=str)
+    def test_23_crear_todo_desde_stream(self, api_client, caso):
+        """
+        Test 23: POST /todos - Crear TODOs desde un dataset JSONL (PARAMETRIZADO POR STREAM)
+        """
+        logger.test_start("test_23_crear_todo_desde_stream")
+        
+        try:
+            # Arrange - el caso se lee del archivo recién ahora
+            todo_data = caso.load()
+            logger.step(f"Creando TODO del caso {caso}: {todo_data['title']}")
+            
+            # Act
+            response = api_client.post("/todos", json=todo_data)
+            logger.api_request("POST", "/todos", response.status_code)
+            
+            # Assert
+            logger.assertion("Status code es 201", response.status_code == 201)
+            assert response.status_code == 201, "Debería retornar 201 Created"
+            
+            created_todo = response.json()
+            coincide = all(created_todo.get(campo) == valor for campo, valor in todo_data.items())
+            logger.assertion("Los campos del caso coinciden con el TODO creado", coincide)
+            assert coincide, f"TODO creado {created_todo} no coincide con el caso {todo_data}"
+            
+            logger.test_end("test_23_crear_todo_desde_stream", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_23_crear_todo_desde_stream", "FAIL")
+            raise
+
+
 class TestAPIActualizaciones:
     """Suite de tests para operaciones de actualización (PUT y PATCH)"""
     
@@ -632,7 +659,7 @@ class TestAPIFlujosComplejos:
             
             # PASO 3: Verificar comentarios del post (usar post existente)
             logger.step("PASO 3: Obtener comentarios del POST (ID=1)")
-            comments_response = api_client.get("/posts/1/comments")
+            comments_response = api_client.get_post_comments(1)
             logger.api_request("GET", "/posts/1/comments", comments_response.status_code)
             assert comments_response.status_code == 200
             
@@ -669,7 +696,7 @@ class TestAPIFlujosComplejos:
             
             # PASO 2: Obtener posts de un usuario existente
             logger.step("PASO 2: Obtener posts del usuario (ID=1)")
-            posts_response = api_client.get("/users/1/posts")
+            posts_response = api_client.get_user_posts(1)
             logger.api_request("GET", "/users/1/posts", posts_response.status_code)
             assert posts_response.status_code == 200
             
@@ -714,7 +741,7 @@ class TestAPIValidacionesAvanzadas:
             logger.step("Obteniendo lista completa de TODOs")
             
             # Act
-            response = api_client.get("/todos")
+            response = api_client.get_all_todos()
             logger.api_request("GET", "/todos", response.status_code)
             
             # Assert
@@ -795,84 +822,250 @@ class TestAPIValidacionesAvanzadas:
 class TestAPIRendimiento:
     """Suite de tests para verificar rendimiento básico"""
     
-    def test_16_tiempo_respuesta_get_todos(self, api_client):
+    @pytest.mark.parametrize(
+        "presupuesto",
+        API_TEST_DATA["presupuestos_latencia"],
+        ids=lambda p: p["endpoint"]
+    )
+    def test_16_latencia_percentiles(self, api_client, benchmark_results, presupuesto):
         """
-        Test 16: Validar tiempo de respuesta para GET /todos
+        Test 16: Validar percentiles de latencia contra el presupuesto del endpoint (PARAMETRIZADO)
         """
-        logger.test_start("test_16_tiempo_respuesta_get_todos")
+        logger.test_start("test_16_latencia_percentiles")
         
         try:
-            import time
-            
-            logger.step("Midiendo tiempo de respuesta")
-            
-            # Act
-            start_time = time.time()
-            response = api_client.get("/todos")
-            end_time = time.time()
-            
-            response_time = (end_time - start_time) * 1000  # Convertir a ms
-            
-            logger.api_request("GET", "/todos", response.status_code)
-            logger.action(f"Tiempo de respuesta: {response_time:.2f}ms")
+            endpoint = presupuesto["endpoint"]
+            logger.step(f"Midiendo latencia de GET {endpoint}")
+            
+            # Act - warm-up + N iteraciones medidas
+            benchmark = APIBenchmark(
+                api_client,
+                warmup=presupuesto.get("warmup", 2),
+                iterations=presupuesto.get("iteraciones", 10)
+            )
+            resultado = benchmark.run(endpoint)
+            benchmark_results.append(resultado)
+            
+            total = resultado["total"]
+            logger.action(
+                f"p50={total['p50_ms']}ms p90={total['p90_ms']}ms p99={total['p99_ms']}ms "
+                f"max={total['max_ms']}ms stddev={total['stddev_ms']}ms"
+            )
+            logger.action(
+                f"TTFB p50={resultado['ttfb']['p50_ms']}ms, descarga p50={resultado['descarga']['p50_ms']}ms, "
+                f"conexión en frío: {resultado['conexion_fria']}"
+            )
             
             # Assert
-            assert response.status_code == 200
+            solo_200 = resultado["status_codes"] == [200]
+            logger.assertion("Todas las iteraciones retornaron 200", solo_200)
+            assert solo_200, f"Status codes inesperados: {resultado['status_codes']}"
             
-            # Validar que el tiempo sea razonable (< 5 segundos)
-            tiempo_razonable = response_time < 5000
-            logger.assertion("Tiempo < 5000ms", tiempo_razonable)
-            assert tiempo_razonable, f"Tiempo de respuesta demasiado alto: {response_time}ms"
+            con_datos = resultado["bytes_respuesta"] > 0
+            logger.assertion("La respuesta tiene datos", con_datos)
+            assert con_datos
             
-            # Validar que haya datos
-            todos = response.json()
-            assert len(todos) > 0
+            violaciones = APIBenchmark.check_budget(resultado, presupuesto)
+            logger.assertion(f"Dentro del presupuesto de {endpoint}", not violaciones)
+            assert not violaciones, f"Presupuesto de latencia excedido en {endpoint}: {violaciones}"
             
-            logger.action(f"Rendimiento aceptable ({response_time:.2f}ms para {len(todos)} items)")
-            logger.test_end("test_16_tiempo_respuesta_get_todos", "PASS")
+            logger.test_end("test_16_latencia_percentiles", "PASS")
         
         except Exception as e:
             logger.error(f"Test falló: {str(e)}")
-            logger.test_end("test_16_tiempo_respuesta_get_todos", "FAIL")
+            logger.test_end("test_16_latencia_percentiles", "FAIL")
             raise
     
-    def test_17_respuestas_concurrentes(self, api_client):
+    @pytest.mark.parametrize("backend", ["thread", "asyncio"])
+    def test_17_respuestas_concurrentes(self, api_client, backend):
         """
-        Test 17: Validar múltiples requests concurrentes
+        Test 17: Validar múltiples requests concurrentes (ambos backends dan el mismo resultado)
         """
         logger.test_start("test_17_respuestas_concurrentes")
         
         try:
-            logger.step("Realizando 5 requests concurrentes")
-            
-            # Act - Simular requests concurrentes
             endpoints = ["/todos/1", "/todos/2", "/todos/3", "/posts/1", "/users/1"]
-            responses = []
-
-            for endpoint in endpoints:
-                response = api_client.get(endpoint)
-                responses.append(response)
-                logger.api_request("GET", endpoint, response.status_code)
+            logger.step(f"Realizando {len(endpoints)} requests concurrentes (backend {backend})")
+            
+            # Act - Disparar todas las requests en paralelo
+            resultado = api_client.run_concurrent(endpoints, concurrency=len(endpoints), backend=backend)
+            responses = resultado.responses
+            
+            for item in resultado.items:
+                logger.api_request(item["method"], item["endpoint"], item["status_code"])
+                logger.action(f"{item['endpoint']}: {item['latency_ms']:.2f}ms")
+            
+            resumen = resultado.summary()
+            logger.action(
+                f"Backend: {resumen['backend']}, wall time: {resumen['wall_time_ms']}ms, "
+                f"suma de latencias: {resumen['suma_latencias_ms']}ms, "
+                f"req/s: {resumen['requests_por_segundo']}, speedup: {resumen['speedup']}x"
+            )
             
             # Assert
             logger.step("Validando todas las respuestas")
             
+            sin_errores = not resultado.errors
+            logger.assertion("Ninguna request falló", sin_errores)
+            assert sin_errores, f"Requests con error: {resultado.errors}"
+            
             all_success = all(r.status_code == 200 for r in responses)
             logger.assertion("Todas las respuestas son 200", all_success)
             assert all_success, "Todas las respuestas deben ser exitosas"
             
+            mismo_tipo = all(isinstance(r, requests.Response) for r in responses)
+            logger.assertion("Todas son requests.Response", mismo_tipo)
+            assert mismo_tipo, f"Tipos de respuesta: {sorted({type(r).__name__ for r in responses})}"
+            
             all_have_data = all(len(r.json()) > 0 for r in responses)
             logger.assertion("Todas tienen datos", all_have_data)
             assert all_have_data
             
             logger.action(f"{len(responses)} requests procesados exitosamente")
             logger.test_end("test_17_respuestas_concurrentes", "PASS")
-        
+
         except Exception as e:
             logger.error(f"Test falló: {str(e)}")
             logger.test_end("test_17_respuestas_concurrentes", "FAIL")
             raise
 
+    def test_21_reutilizacion_conexiones(self, api_client):
+        """
+        Test 21: Validar que la sesión compartida reutiliza conexiones keep-alive
+        """
+        logger.test_start("test_21_reutilizacion_conexiones")
+
+        cassette = api_client.cassette
+        if cassette and cassette.enabled:
+            pytest.skip("Con cassette activo las respuestas no usan el pool de conexiones")
+
+        try:
+            logger.step("Realizando requests secuenciales sobre la sesión compartida")
+
+            stats_inicial = api_client.connection_stats()
+
+            # Act
+            cantidad = 5
+            for todo_id in range(1, cantidad + 1):
+                response = api_client.get(f"/todos/{todo_id}")
+                logger.api_request("GET", f"/todos/{todo_id}", response.status_code)
+                assert response.status_code == 200
+
+            stats_final = api_client.connection_stats()
+            abiertas = stats_final["conexiones_abiertas"] - stats_inicial["conexiones_abiertas"]
+            reutilizadas = stats_final["conexiones_reutilizadas"] - stats_inicial["conexiones_reutilizadas"]
+            logger.action(f"Conexiones abiertas: {abiertas}, reutilizadas: {reutilizadas}")
+
+            # Assert - A lo sumo una conexión nueva, el resto reutilizadas
+            logger.assertion("A lo sumo 1 conexión nueva", abiertas <= 1)
+            assert abiertas <= 1, f"Se abrieron {abiertas} conexiones para {cantidad} requests"
+
+            logger.assertion(f"Al menos {cantidad - 1} reutilizadas", reutilizadas >= cantidad - 1)
+            assert reutilizadas >= cantidad - 1
+
+            logger.test_end("test_21_reutilizacion_conexiones", "PASS")
+
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_21_reutilizacion_conexiones", "FAIL")
+            raise
+
+
+    def test_22_cache_respuestas_get(self, api_client):
+        """
+        Test 22: Validar hits, desalojo LRU y bypass del cache de respuestas GET
+        """
+        logger.test_start("test_22_cache_respuestas_get")
+
+        try:
+            logger.step("Creando cliente con cache propio (2 entradas)")
+            cache = ResponseCache(max_entries=2, ttl=60)
+            cliente = APIClient(api_client.base_url, api_client.session, cache=cache)
+
+            # Act - Misma lectura dos veces
+            primera = cliente.get_user(1)
+            segunda = cliente.get_user(1)
+            logger.api_request("GET", "/users/1", primera.status_code)
+
+            # Assert - La segunda lectura sale del cache, como copia aislada
+            assert primera.status_code == 200
+            desde_cache = cache.stats()["hits"] == 1 and segunda.json() == primera.json()
+            logger.assertion("Segunda lectura servida desde el cache", desde_cache)
+            assert desde_cache
+
+            segunda.headers["X-Modificado"] = "true"
+            tercera = cliente.get_user(1)
+            aislada = segunda is not primera and "X-Modificado" not in tercera.headers
+            logger.assertion("Modificar una respuesta cacheada no afecta a las siguientes", aislada)
+            assert aislada
+            assert cache.stats()["hits"] == 2
+
+            logger.step("Superando el tamaño máximo para forzar desalojo LRU")
+            cliente.get_user(2)
+            cliente.get_user(3)
+            stats = cache.stats()
+            logger.action(f"Stats del cache: {stats}")
+            logger.assertion("Se desalojó la entrada menos usada", stats["desalojos"] == 1)
+            assert stats["desalojos"] == 1
+            assert stats["entradas"] == 2
+
+            logger.step("Verificando bypass del cache")
+            with cliente.sin_cache():
+                sin_cache = cliente.get_user(3)
+            assert sin_cache.status_code == 200
+            assert cache.stats()["hits"] == 2, "El bypass no debería contar como hit"
+
+            logger.test_end("test_22_cache_respuestas_get", "PASS")
+
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_22_cache_respuestas_get", "FAIL")
+            raise
+
+    def test_24_cache_revalidacion_tras_desalojo(self, api_client):
+        """
+        Test 24: Un 304 sobre una entrada desalojada entre la consulta y la revalidación
+        vuelve a guardarla en lugar de fallar
+        """
+        logger.test_start("test_24_cache_revalidacion_tras_desalojo")
+
+        class CacheQueDesaloja(ResponseCache):
+            """Simula otro thread que vacía el cache justo después de cada consulta"""
+            def lookup(self, key):
+                resultado = super().lookup(key)
+                self.clear()
+                return resultado
+
+        try:
+            # Arrange - TTL 0: toda lectura posterior revalida con If-None-Match
+            cache = CacheQueDesaloja(max_entries=2, ttl=0)
+            cliente = APIClient(api_client.base_url, api_client.session, cache=cache)
+            if api_client.cassette is not None:
+                pytest.skip("El cassette no graba respuestas 304")
+            primera = cliente.get_user(1)
+            if not primera.headers.get("ETag"):
+                pytest.skip("El backend no envía ETag")
+
+            # Act
+            logger.step("Revalidando una entrada desalojada durante el request")
+            segunda = cliente.get_user(1)
+
+            # Assert
+            stats = cache.stats()
+            logger.action(f"Stats del cache: {stats}")
+            logger.assertion("El 304 se resolvió con la entrada consultada", segunda.json() == primera.json())
+            assert segunda.status_code == 200
+            assert segunda.json() == primera.json()
+            assert stats["revalidaciones"] == 1
+            assert stats["entradas"] == 1, "La entrada revalidada debería volver al cache"
+
+            logger.test_end("test_24_cache_revalidacion_tras_desalojo", "PASS")
+
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_24_cache_revalidacion_tras_desalojo", "FAIL")
+            raise
+
 
 class TestAPIIntegridad:
     """Suite de tests para validar integridad de datos"""
@@ -887,7 +1080,7 @@ class TestAPIIntegridad:
             logger.step("Obteniendo usuario y validando sus posts")
             
             # PASO 1: Obtener usuario
-            user_response = api_client.get("/users/1")
+            user_response = api_client.get_user(1)
             logger.api_request("GET", "/users/1", user_response.status_code)
             assert user_response.status_code == 200
             
@@ -896,7 +1089,7 @@ class TestAPIIntegridad:
             logger.action(f"Usuario: {user['name']}")
             
             # PASO 2: Obtener posts del usuario
-            posts_response = api_client.get(f"/users/{user_id}/posts")
+            posts_response = api_client.get_user_posts(user_id)
             logger.api_request("GET", f"/users/{user_id}/posts", posts_response.status_code)
             assert posts_response.status_code == 200
             
@@ -911,7 +1104,7 @@ class TestAPIIntegridad:
             # PASO 4: Obtener comentarios del primer post
             if len(posts) > 0:
                 first_post_id = posts[0]["id"]
-                comments_response = api_client.get(f"/posts/{first_post_id}/comments")
+                comments_response = api_client.get_post_comments(first_post_id)
                 logger.api_request("GET", f"/posts/{first_post_id}/comments", comments_response.status_code)
                 assert comments_response.status_code == 200
                 
@@ -941,7 +1134,7 @@ class TestAPIIntegridad:
             logger.step("Validando tipos de datos en TODO")
             
             # Act
-            response = api_client.get("/todos/1")
+            response = api_client.get_todo(1)
             logger.api_request("GET", "/todos/1", response.status_code)
             assert response.status_code == 200
             
@@ -989,7 +1182,7 @@ class TestAPIIntegridad:
             logger.step("Obteniendo lista de TODOs")
             
             # Act
-            response = api_client.get("/todos")
+            response = api_client.get_all_todos()
             logger.api_request("GET", "/todos", response.status_code)
             assert response.status_code == 200
             
@@ -1026,12 +1219,12 @@ class TestAPIIntegridad:
 # FIXTURES Y CONFIGURACIÓN ADICIONAL
 
 @pytest.fixture(scope="session", autouse=True)
-def log_test_session_info():
+def log_test_session_info(base_url):
     """Fixture para loggear información de la sesión de tests"""
     logger.info("INICIANDO SUITE DE TESTS DE API COMPLETA")
     logger.info(f"Archivo de datos: data/test_data_api.json")
     logger.info(f"Total de clases de test: 8")
-    logger.info(f"Endpoint base: https://jsonplaceholder.typicode.com")
+    logger.info(f"Endpoint base: {base_url}")
     
     yield
     
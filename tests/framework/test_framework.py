@@ -0,0 +1,382 @@
+import json
+import threading
+import time
+import pytest
+import requests
+from api_client import APIClient, Cassette, consolidar_cassettes_workers
+from local_server import LocalJSONPlaceholderServer
+from utils import get_logger, DataLoader, DataStream, SpanRecorder, sumar_estadisticas
+
+logger = get_logger(__name__)
+
+pytestmark = pytest.mark.framework
+
+
+def _escribir_casos(tmp_path, total):
+    """Mismos casos en JSONL y en CSV (con encabezado)"""
+    casos = [{"first_name": f"Usuario{i}", "last_name": f"DePrueba{i}", "postal_code": f"{1000 + i}"} for i in range(total)]
+    jsonl_file = tmp_path / "casos.jsonl"
+    csv_file = tmp_path / "casos.csv"
+    jsonl_file.write_text("".join(json.dumps(caso) + "\n" for caso in casos), encoding="utf-8")
+    csv_file.write_text(
+        "first_name,last_name,postal_code\n"
+        + "".join(f"{c['first_name']},{c['last_name']},{c['postal_code']}\n" for c in casos),
+        encoding="utf-8"
+    )
+    return casos, jsonl_file, csv_file
+
+
+class TestFuentesDeDatos:
+    """Tests funcionales de las fuentes de datos del framework (DataStream)"""
+    
+    def test_01_stream_por_shard(self, tmp_path):
+        """
+        Test 1: Los shards reparten todos los casos sin repetir y cada referencia carga su línea
+        """
+        logger.test_start("test_01_stream_por_shard")
+        
+        try:
+            # Arrange
+            casos, jsonl_file, _ = _escribir_casos(tmp_path, 103)
+            stream = DataStream(jsonl_file)
+            
+            # Act
+            logger.step("Dividiendo 103 casos en 4 shards")
+            shards = [stream.casos(shard=(indice, 4)) for indice in range(4)]
+            
+            # Assert
+            tamanios = [len(shard) for shard in shards]
+            logger.assertion("Los shards quedan balanceados (26/26/26/25)", tamanios == [26, 26, 26, 25])
+            assert tamanios == [26, 26, 26, 25], f"Tamaños de shard inesperados: {tamanios}"
+            
+            numeros = sorted(caso.numero for shard in shards for caso in shard)
+            logger.assertion("Cada caso cae en exactamente un shard", numeros == list(range(len(casos))))
+            assert numeros == list(range(len(casos))), "Hay casos repetidos o faltantes entre shards"
+            
+            cargas_ok = all(caso.load() == casos[caso.numero] for caso in shards[1])
+            logger.assertion("Cada referencia carga el caso de su línea", cargas_ok)
+            assert cargas_ok, "Alguna referencia cargó un caso distinto al de su número"
+            
+            rango = [caso.numero for caso in stream.casos(inicio=10, fin=20, shard=(1, 4))]
+            logger.assertion("Rango y shard se combinan", rango == [13, 17])
+            assert rango == [13, 17], f"Casos del rango [10, 20) en el shard 2/4: {rango}"
+            
+            logger.test_end("test_01_stream_por_shard", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_stream_por_shard", "FAIL")
+            raise
+    
+    def test_02_stream_csv_equivale_a_jsonl(self, tmp_path):
+        """
+        Test 2: Un CSV con encabezado produce los mismos registros que el JSONL equivalente
+        """
+        logger.test_start("test_02_stream_csv_equivale_a_jsonl")
+        
+        try:
+            # Arrange
+            casos, jsonl_file, csv_file = _escribir_casos(tmp_path, 50)
+            
+            # Act
+            logger.step("Leyendo ambos archivos completos y un caso suelto")
+            desde_jsonl = list(DataStream(jsonl_file))
+            desde_csv = list(DataStream(csv_file))
+            caso_42 = DataStream(csv_file).casos(inicio=42, fin=43)[0].load()
+            
+            # Assert
+            logger.assertion("JSONL y CSV producen los mismos registros", desde_jsonl == desde_csv == casos)
+            assert desde_jsonl == desde_csv == casos, "Los registros CSV difieren de los JSONL"
+            
+            logger.assertion("Un caso suelto del CSV coincide", caso_42 == casos[42])
+            assert caso_42 == casos[42], f"Caso 42 del CSV: {caso_42}"
+            
+            logger.test_end("test_02_stream_csv_equivale_a_jsonl", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_02_stream_csv_equivale_a_jsonl", "FAIL")
+            raise
+
+
+class TestIndicesDataLoader:
+    """Tests funcionales de los índices precalculados del DataLoader"""
+    
+    def test_01_busquedas_por_campo(self, tmp_path):
+        """
+        Test 1: index() y get_usuario() encuentran los items por campo, con el primero ganando
+        ante valores repetidos, y el índice se calcula una sola vez
+        """
+        logger.test_start("test_01_busquedas_por_campo")
+        
+        try:
+            # Arrange
+            data_file = tmp_path / "datos.json"
+            data_file.write_text(json.dumps({
+                "usuarios_validos": [{"username": "standard_user", "password": "a"}],
+                "usuarios_invalidos": [{"username": "locked_out_user", "password": "b"}],
+                "productos": [
+                    {"id": "add-to-cart-a", "nombre": "A"},
+                    {"id": "add-to-cart-b", "nombre": "B"},
+                    {"id": "add-to-cart-a", "nombre": "A repetido"},
+                ],
+            }), encoding="utf-8")
+            loader = DataLoader(data_file)
+            
+            # Act
+            logger.step("Buscando usuarios y productos por campo")
+            valido = loader.get_usuario("standard_user")
+            invalido = loader.get_usuario("locked_out_user")
+            productos = loader.index("productos", "id")
+            
+            # Assert
+            usuarios_ok = valido["password"] == "a" and invalido["password"] == "b" and \
+                loader.get_usuario("no_existe") is None
+            logger.assertion("Usuarios válidos e inválidos por username", usuarios_ok)
+            assert usuarios_ok, f"Usuarios encontrados: {valido}, {invalido}"
+            
+            productos_ok = sorted(productos) == ["add-to-cart-a", "add-to-cart-b"] and \
+                productos["add-to-cart-a"]["nombre"] == "A"
+            logger.assertion("Productos por id (el primero ante repetidos)", productos_ok)
+            assert productos_ok, f"Índice de productos: {productos}"
+            
+            logger.assertion("El índice se reutiliza", loader.index("productos", "id") is productos)
+            assert loader.index("productos", "id") is productos, "El índice se recalculó"
+            
+            logger.test_end("test_01_busquedas_por_campo", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_busquedas_por_campo", "FAIL")
+            raise
+
+
+class TestSpanRecorder:
+    """Tests funcionales del registro de spans (desglose de tiempos del reporte)"""
+    
+    def test_01_pasos_solo_dentro_de_un_test(self):
+        """
+        Test 1: Los pasos fuera de un test registrado no quedan abiertos ni se agregan a la sesión,
+        y el agregado exportado por un worker se suma en el controlador
+        """
+        logger.test_start("test_01_pasos_solo_dentro_de_un_test")
+        
+        try:
+            # Arrange
+            recorder = SpanRecorder()
+            
+            # Act
+            logger.step("Registrando pasos fuera y dentro de un test")
+            recorder.step("PASO: fuera de un test")
+            recorder.begin_test("test_ui")
+            recorder.step("PASO: dentro del test")
+            with recorder.span("pagina.metodo"):
+                pass
+            filas = recorder.end_test()
+            
+            controlador = SpanRecorder()
+            controlador.importar(recorder.exportar())
+            controlador.importar(recorder.exportar())
+            
+            # Assert
+            rutas = {fila["ruta"] for fila in recorder.session_breakdown()}
+            esperadas = {("PASO: dentro del test",), ("PASO: dentro del test", "pagina.metodo")}
+            logger.assertion("Solo se registran los pasos del test", rutas == esperadas)
+            assert rutas == esperadas, f"Rutas registradas en la sesión: {rutas}"
+            assert {fila["ruta"] for fila in filas} == esperadas, f"Desglose del test: {filas}"
+            
+            llamadas = {fila["ruta"]: fila["llamadas"] for fila in controlador.session_breakdown()}
+            logger.assertion("El controlador suma lo exportado por los workers", llamadas == dict.fromkeys(esperadas, 2))
+            assert llamadas == dict.fromkeys(esperadas, 2), f"Llamadas agregadas: {llamadas}"
+            
+            logger.test_end("test_01_pasos_solo_dentro_de_un_test", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_pasos_solo_dentro_de_un_test", "FAIL")
+            raise
+
+
+class TestEstadisticasSesion:
+    """Tests funcionales de la suma de estadísticas entre workers de xdist"""
+    
+    def test_01_suma_de_workers(self):
+        """
+        Test 1: Los contadores se suman, los textos conservan el primer valor y los ratios se omiten
+        """
+        logger.test_start("test_01_suma_de_workers")
+        
+        try:
+            # Arrange
+            worker_1 = {"api": {"cassette": {"modo": "auto", "hits": 3, "misses": 1, "hit_ratio": 0.75}}}
+            worker_2 = {"api": {"cassette": {"modo": "auto", "hits": 1, "misses": 3, "hit_ratio": 0.25}},
+                        "reporte": {"embebidas": 2}}
+            
+            # Act
+            logger.step("Sumando las estadísticas de dos workers")
+            total = sumar_estadisticas(sumar_estadisticas({}, worker_1), worker_2)
+            
+            # Assert
+            esperado = {"api": {"cassette": {"modo": "auto", "hits": 4, "misses": 4}}, "reporte": {"embebidas": 2}}
+            logger.assertion("Estadísticas sumadas correctamente", total == esperado)
+            assert total == esperado, f"Estadísticas sumadas: {total}"
+            
+            logger.test_end("test_01_suma_de_workers", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_suma_de_workers", "FAIL")
+            raise
+
+
+class TestCassette:
+    """Tests funcionales del cassette HTTP (grabación y reproducción de respuestas)"""
+    
+    def test_01_grabaciones_de_workers_se_reproducen_en_otro_puerto(self, tmp_path, monkeypatch):
+        """
+        Test 1: Lo grabado por cada worker se consolida en un cassette único que se reproduce
+        contra otro host/puerto (la clave es path + query, no la URL completa)
+        """
+        logger.test_start("test_01_grabaciones_de_workers_se_reproducen_en_otro_puerto")
+        
+        def _grabar(worker_id, url, texto):
+            monkeypatch.setenv("PYTEST_XDIST_WORKER", worker_id)
+            cassette = Cassette(path=tmp_path / "api.json.gz", mode="record")
+            request = requests.Request("GET", url).prepare()
+            response = requests.Response()
+            response.status_code = 200
+            response._content = texto.encode("utf-8")
+            cassette.record(request, response)
+            cassette.save()
+        
+        try:
+            # Arrange
+            logger.step("Grabando una respuesta distinta en cada worker")
+            _grabar("gw0", "http://127.0.0.1:40001/users/1", '{"id": 1}')
+            _grabar("gw1", "http://127.0.0.1:40002/users?_limit=2&id=2", '[{"id": 2}]')
+            
+            # Act
+            monkeypatch.setenv("PYTEST_XDIST_WORKER", "master")
+            consolidados = consolidar_cassettes_workers(tmp_path / "api.json.gz")
+            cassette = Cassette(path=tmp_path / "api.json.gz", mode="replay")
+            usuario = cassette.lookup(requests.Request("GET", "https://otro.host/users/1").prepare())
+            lista = cassette.lookup(requests.Request("GET", "http://127.0.0.1:50000/users?id=2&_limit=2").prepare())
+            
+            # Assert
+            archivos = sorted(path.name for path in tmp_path.iterdir())
+            logger.assertion("Solo queda el cassette consolidado", archivos == ["api.json.gz"])
+            assert consolidados == 2, f"Cassettes de workers consolidados: {consolidados}"
+            assert archivos == ["api.json.gz"], f"Archivos tras consolidar: {archivos}"
+            
+            reproducidas = usuario is not None and lista is not None
+            logger.assertion("Ambas grabaciones se reproducen en otro host/puerto", reproducidas)
+            assert reproducidas, "Alguna grabación no se encontró al cambiar host, puerto u orden de la query"
+            assert usuario["text"] == '{"id": 1}' and lista["text"] == '[{"id": 2}]'
+            
+            logger.test_end("test_01_grabaciones_de_workers_se_reproducen_en_otro_puerto", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_grabaciones_de_workers_se_reproducen_en_otro_puerto", "FAIL")
+            raise
+
+
+class TestServidorLocal:
+    """Tests funcionales del servidor local que emula JSONPlaceholder"""
+    
+    def test_01_paginacion_invalida_se_ignora(self):
+        """
+        Test 1: Valores no numéricos de _limit/_start/_end se ignoran (como JSONPlaceholder)
+        en lugar de cortar la conexión
+        """
+        logger.test_start("test_01_paginacion_invalida_se_ignora")
+        server = LocalJSONPlaceholderServer().start()
+        
+        try:
+            # Act
+            logger.step("Consultando /todos con paginación inválida")
+            invalida = requests.get(f"{server.url}/todos", params={"_limit": "abc", "_start": "x"}, timeout=5)
+            mixta = requests.get(f"{server.url}/todos", params={"_start": "10", "_end": "diez"}, timeout=5)
+            valida = requests.get(f"{server.url}/todos", params={"_start": "10", "_limit": "5"}, timeout=5)
+            
+            # Assert
+            logger.assertion("Paginación inválida ignorada", invalida.status_code == 200 and len(invalida.json()) == 200)
+            assert invalida.status_code == 200, f"Status con _limit=abc: {invalida.status_code}"
+            assert len(invalida.json()) == 200, f"TODOs con paginación inválida: {len(invalida.json())}"
+            
+            ids_mixta = [todo["id"] for todo in mixta.json()]
+            assert ids_mixta == list(range(11, 201)), "Un _end inválido no debería anular un _start válido"
+            
+            ids_valida = [todo["id"] for todo in valida.json()]
+            logger.assertion("Paginación válida se sigue aplicando", ids_valida == [11, 12, 13, 14, 15])
+            assert ids_valida == [11, 12, 13, 14, 15], f"IDs con _start=10&_limit=5: {ids_valida}"
+            
+            logger.test_end("test_01_paginacion_invalida_se_ignora", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_paginacion_invalida_se_ignora", "FAIL")
+            raise
+        
+        finally:
+            server.stop()
+
+
+class _ClienteLento(APIClient):
+    """Cliente sin red: cada request tarda 200 ms y se cuenta cuántas hay en vuelo a la vez"""
+    
+    def __init__(self):
+        super().__init__("http://sin-red", requests.Session())
+        self._lock = threading.Lock()
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+    
+    def request(self, method, endpoint, **kwargs):
+        with self._lock:
+            self.en_vuelo += 1
+            self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+        time.sleep(0.2)
+        with self._lock:
+            self.en_vuelo -= 1
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+class TestConcurrenciaAPI:
+    """Tests funcionales de los backends de carga concurrente del APIClient"""
+    
+    @pytest.mark.parametrize("backend", ["thread", "asyncio"])
+    def test_01_concurrencia_mayor_al_executor_por_defecto(self, backend):
+        """
+        Test 1: Con concurrencia 40 (mayor que los 32 threads del executor por defecto de asyncio)
+        las 40 requests se superponen en ambos backends
+        """
+        logger.test_start("test_01_concurrencia_mayor_al_executor_por_defecto")
+        
+        try:
+            # Arrange
+            cliente = _ClienteLento()
+            endpoints = [f"/todos/{i}" for i in range(1, 41)]
+            
+            # Act
+            logger.step(f"Disparando 40 requests de 200 ms con concurrencia 40 (backend {backend})")
+            resultado = cliente.run_concurrent(endpoints, concurrency=40, backend=backend)
+            
+            # Assert
+            logger.action(f"Máximo en vuelo: {cliente.max_en_vuelo}, wall time: {resultado.wall_time_ms:.0f} ms")
+            logger.assertion("Sin errores", not resultado.errors)
+            assert not resultado.errors, f"Requests con error: {resultado.errors}"
+            
+            superpuestas = cliente.max_en_vuelo == resultado.concurrency == 40
+            logger.assertion("Las 40 requests estuvieron en vuelo a la vez", superpuestas)
+            assert superpuestas, (
+                f"Concurrencia reportada {resultado.concurrency}, alcanzada {cliente.max_en_vuelo}"
+            )
+            
+            logger.test_end("test_01_concurrencia_mayor_al_executor_por_defecto", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_concurrencia_mayor_al_executor_por_defecto", "FAIL")
+            raise
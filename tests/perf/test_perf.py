@@ -0,0 +1,321 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+import pytest
+import utils
+from utils import QUIET_PERF, DataLoader, DataStream, cargar_dataset, get_logger, crear_formatter, crear_handler_asincrono
+
+logger = get_logger(__name__)
+
+
+def _logger_aislado(nombre, handler):
+    """Logger fuera de la jerarquía root para medir sin tocar el logging de la sesión"""
+    bench_logger = logging.getLogger(nombre)
+    bench_logger.handlers.clear()
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.DEBUG)
+    bench_logger.addHandler(handler)
+    return bench_logger
+
+
+def _microsegundos_por_llamada(bench_logger, rafagas, por_rafaga=5, pausa=0.001):
+    """
+    Costo promedio en el thread llamador de un debug típico de los Page Objects.
+    Simula un test real: ráfagas de logs separadas por una pausa equivalente a un
+    round trip de WebDriver (el thread libera el GIL y el listener puede escribir).
+    Solo se cronometran las llamadas de logging.
+    """
+    total_ns = 0
+    for _ in range(rafagas):
+        inicio = time.perf_counter_ns()
+        for i in range(por_rafaga):
+            bench_logger.debug("Buscando elemento: %s", ("id", f"elemento-{i}"))
+        total_ns += time.perf_counter_ns() - inicio
+        time.sleep(pausa)
+    return total_ns / (rafagas * por_rafaga) / 1000
+
+
+def _microsegundos_por_10k(llamar, repeticiones=5):
+    """Mejor tiempo (µs) de 10.000 llamadas entre varias repeticiones, para reducir ruido"""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        for i in range(10_000):
+            llamar(i)
+        mejor = min(mejor, time.perf_counter_ns() - inicio)
+    return mejor / 1000
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+def _importtime_coleccion(markexpr):
+    """
+    Colecciona la suite en un proceso nuevo con -X importtime.
+
+    Returns:
+        (ms totales de imports, set de módulos importados, segundos de pared)
+    """
+    entorno = {k: v for k, v in os.environ.items() if not k.startswith(("PYTEST_XDIST", "PYTEST_CURRENT"))}
+    comando = [
+        sys.executable, "-X", "importtime", "-m", "pytest", "--collect-only", "-q",
+        "-p", "no:cacheprovider", "-o", "addopts=", "-m", markexpr, "tests"
+    ]
+    inicio = time.perf_counter()
+    resultado = subprocess.run(comando, cwd=ROOT_DIR, env=entorno, capture_output=True, text=True)
+    pared = time.perf_counter() - inicio
+    assert resultado.returncode == 0, resultado.stdout[-2000:]
+
+    total_us, modulos = 0, set()
+    for linea in resultado.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, _, nombre = linea[len("import time:"):].split("|")
+        total_us += int(propio)
+        modulos.add(nombre.strip())
+    return total_us / 1000, modulos, pared
+
+
+@pytest.mark.perf
+class TestPerformanceFramework:
+    """Benchmarks del overhead del propio framework"""
+    
+    def test_01_overhead_logging_sync_vs_async(self, tmp_path):
+        """
+        Test 1: Overhead por llamada de logging con handlers sincrónicos vs QueueHandler/QueueListener
+        """
+        logger.test_start("test_01_overhead_logging_sync_vs_async")
+        
+        try:
+            rafagas, por_rafaga = 400, 5
+            llamadas = rafagas * por_rafaga
+            
+            # Arrange + Act - handler de archivo sincrónico (modo por defecto)
+            logger.step(f"Midiendo {llamadas} llamadas con FileHandler sincrónico")
+            sync_handler = logging.FileHandler(tmp_path / "sync.log", encoding="utf-8")
+            sync_handler.setFormatter(crear_formatter())
+            sync_us = _microsegundos_por_llamada(_logger_aislado("perf.logging.sync", sync_handler), rafagas, por_rafaga)
+            sync_handler.close()
+            
+            # Act - mismo handler detrás de la cola (LOG_ASYNC=true)
+            logger.step(f"Midiendo {llamadas} llamadas con QueueHandler + QueueListener")
+            async_file_handler = logging.FileHandler(tmp_path / "async.log", encoding="utf-8")
+            async_file_handler.setFormatter(crear_formatter())
+            queue_handler, listener = crear_handler_asincrono([async_file_handler], maxsize=llamadas)
+            listener.start()
+            async_us = _microsegundos_por_llamada(_logger_aislado("perf.logging.async", queue_handler), rafagas, por_rafaga)
+            listener.stop()
+            async_file_handler.close()
+            
+            logger.info(
+                f"Overhead por llamada - sync: {sync_us:.2f} µs, async: {async_us:.2f} µs "
+                f"({sync_us / async_us:.1f}x)"
+            )
+            
+            # Assert - no se pierden registros (los tiempos quedan como métrica: dependen
+            # de la carga de la máquina y con xdist compiten con otros workers)
+            for nombre in ("sync.log", "async.log"):
+                with open(tmp_path / nombre, encoding="utf-8") as f:
+                    lineas = sum(1 for _ in f)
+                logger.assertion(f"{nombre} tiene los {llamadas} registros", lineas == llamadas)
+                assert lineas == llamadas, f"{nombre}: {lineas} registros, se esperaban {llamadas}"
+            
+            logger.test_end("test_01_overhead_logging_sync_vs_async", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_01_overhead_logging_sync_vs_async", "FAIL")
+            raise
+    
+    def test_02_overhead_debug_deshabilitado(self):
+        """
+        Test 2: Costo de 10k llamadas de debug con el nivel deshabilitado (f-string vs formateo diferido)
+        y de 10k info con el nivel "quiet perf"
+        """
+        logger.test_start("test_02_overhead_debug_deshabilitado")
+        
+        try:
+            # Arrange - logger con el nivel por defecto (INFO): el debug está deshabilitado
+            bench = get_logger("perf.logging.gating")
+            bench.set_level(logging.INFO)
+            locator = ("css selector", ".inventory_item button")
+            
+            # Act
+            logger.step("Midiendo 10k debug deshabilitados con f-string y con argumentos diferidos")
+            eager_us = _microsegundos_por_10k(lambda i: bench.debug(f"Buscando elemento: {locator} #{i}"))
+            lazy_us = _microsegundos_por_10k(lambda i: bench.debug("Buscando elemento: %s #%d", locator, i))
+            
+            logger.step("Midiendo 10k info con nivel QUIET")
+            bench.set_level(QUIET_PERF)
+            quiet_us = _microsegundos_por_10k(lambda i: bench.info("Click en: %s #%d", locator, i))
+            
+            logger.info(
+                f"Costo por 10k llamadas deshabilitadas - f-string: {eager_us:.0f} µs, "
+                f"diferido: {lazy_us:.0f} µs ({eager_us / lazy_us:.1f}x), info en QUIET: {quiet_us:.0f} µs"
+            )
+            
+            # Assert - el debug deshabilitado no formatea sus argumentos (los tiempos quedan como métrica)
+            formateos = []
+            
+            class Argumento:
+                def __str__(self):
+                    formateos.append(1)
+                    return "argumento"
+            
+            bench.set_level(logging.INFO)
+            bench.debug("Buscando elemento: %s", Argumento())
+            bench.action("Click en: %s", Argumento())
+            logger.assertion("El debug deshabilitado no formatea sus argumentos", not formateos)
+            assert not formateos, f"Se formatearon {len(formateos)} argumento(s) de llamadas deshabilitadas"
+            
+            bench.set_level(QUIET_PERF)
+            
+            silenciado = not bench.is_enabled_for(logging.WARNING) and bench.is_enabled_for(logging.ERROR)
+            logger.assertion("QUIET descarta info/warning y conserva errores", silenciado)
+            assert silenciado, "El nivel QUIET no filtra como se esperaba"
+            
+            logger.test_end("test_02_overhead_debug_deshabilitado", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_02_overhead_debug_deshabilitado", "FAIL")
+            raise
+    
+    def test_03_cache_de_datasets(self, tmp_path, monkeypatch):
+        """
+        Test 3: Un dataset grande se parsea una vez por proceso y, en un proceso nuevo,
+        se lee del cache pickle en lugar de volver a parsear el JSON
+        """
+        logger.test_start("test_03_cache_de_datasets")
+        
+        try:
+            # Arrange - dataset de ~2 MB (los índices se validan en tests/framework)
+            logger.step("Generando dataset grande")
+            monkeypatch.setattr(utils.Config, "DATA_CACHE_DIR", str(tmp_path / "cache"))
+            data_file = tmp_path / "dataset_grande.json"
+            data_file.write_text(json.dumps({
+                "productos": [{"id": f"producto-{i}", "nombre": f"Producto {i}", "precio": i * 1.5} for i in range(20_000)],
+                "recursos": [{"tipo": ("todo", "post", "user")[i % 3], "id": i} for i in range(20_000)],
+            }), encoding="utf-8")
+            
+            # Act - primera carga (parseo JSON + escritura del pickle)
+            inicio = time.perf_counter()
+            datos = cargar_dataset(data_file)
+            parseo_ms = (time.perf_counter() - inicio) * 1000
+            
+            logger.step("Midiendo carga repetida en el proceso y carga desde pickle")
+            inicio = time.perf_counter()
+            repetida = DataLoader(data_file)["productos"]
+            repetida_ms = (time.perf_counter() - inicio) * 1000
+            
+            # Un proceso nuevo (otro worker) no tiene el cache en memoria pero sí el pickle
+            utils._DATASETS.clear()
+            inicio = time.perf_counter()
+            desde_pickle = cargar_dataset(data_file)
+            pickle_ms = (time.perf_counter() - inicio) * 1000
+            
+            logger.info(
+                f"Carga de {data_file.stat().st_size / 1024 / 1024:.1f} MB - JSON: {parseo_ms:.1f} ms, "
+                f"cache en proceso: {repetida_ms:.3f} ms, pickle: {pickle_ms:.1f} ms"
+            )
+            
+            # Assert
+            mismo_objeto = repetida is datos["productos"]
+            logger.assertion("Las instancias del proceso comparten el dataset parseado", mismo_objeto)
+            assert mismo_objeto, "DataLoader volvió a parsear un archivo ya cargado"
+            
+            logger.assertion("El pickle reproduce los mismos datos", desde_pickle == datos)
+            assert desde_pickle == datos, "Los datos del pickle difieren del JSON"
+            
+            logger.test_end("test_03_cache_de_datasets", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_03_cache_de_datasets", "FAIL")
+            raise
+    
+    def test_04_stream_de_casos_por_shard(self, tmp_path):
+        """
+        Test 4: Coleccionar casos de un JSONL grande por shard no materializa el dataset
+        """
+        logger.test_start("test_04_stream_de_casos_por_shard")
+        
+        try:
+            # Arrange - 50k casos en JSONL (la corrección de shards y CSV se valida en tests/framework)
+            logger.step("Generando dataset JSONL de 50k casos")
+            total = 50_000
+            jsonl_file = tmp_path / "casos.jsonl"
+            with open(jsonl_file, "w", encoding="utf-8") as f:
+                for i in range(total):
+                    f.write(json.dumps({"first_name": f"Usuario{i}", "last_name": f"DePrueba{i}", "postal_code": f"{1000 + i}"}) + "\n")
+            
+            # Act - colección del shard 2/4 vs. lista materializada
+            logger.step("Midiendo memoria de la colección por stream y de la lista completa")
+            tracemalloc.start()
+            casos = DataStream(jsonl_file).casos(shard=(1, 4))
+            _, pico_stream = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            tracemalloc.start()
+            with open(jsonl_file, encoding="utf-8") as f:
+                materializado = [json.loads(linea) for linea in f]
+            _, pico_lista = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            logger.info(
+                f"Pico de memoria al coleccionar {len(casos)} de {total} casos - "
+                f"stream: {pico_stream / 1024:.0f} KB, lista completa: {pico_lista / 1024:.0f} KB"
+            )
+            
+            # Assert
+            mas_liviano = pico_stream < pico_lista / 2
+            logger.assertion("La colección por stream usa menos de la mitad de memoria", mas_liviano)
+            assert mas_liviano, f"stream: {pico_stream} bytes vs lista: {pico_lista} bytes"
+            
+            logger.test_end("test_04_stream_de_casos_por_shard", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_04_stream_de_casos_por_shard", "FAIL")
+            raise
+    
+    def test_05_coleccion_api_sin_selenium(self):
+        """
+        Test 5: Coleccionar solo tests de API (-m api) no importa Selenium ni el conftest de UI
+        (módulos registrados con -X importtime; los tiempos se reportan como métrica)
+        """
+        logger.test_start("test_05_coleccion_api_sin_selenium")
+        
+        try:
+            # Act
+            logger.step("Coleccionando -m api y la suite completa con -X importtime")
+            full_ms, full_modulos, full_pared = _importtime_coleccion("")
+            api_ms, api_modulos, api_pared = _importtime_coleccion("api")
+            
+            logger.info(
+                f"Imports al coleccionar - solo API: {api_ms:.0f} ms ({len(api_modulos)} módulos, "
+                f"{api_pared:.2f}s de pared), suite completa: {full_ms:.0f} ms "
+                f"({len(full_modulos)} módulos, {full_pared:.2f}s de pared)"
+            )
+            
+            # Assert
+            sin_selenium = not any(m.startswith("selenium") for m in api_modulos)
+            logger.assertion("La colección -m api no importa Selenium", sin_selenium)
+            assert sin_selenium, "La colección de tests de API importó selenium"
+            
+            con_selenium = any(m.startswith("selenium") for m in full_modulos)
+            logger.assertion("La suite completa sí importa Selenium (control)", con_selenium)
+            assert con_selenium, "La suite completa no importó selenium: la medición no es válida"
+            
+            logger.test_end("test_05_coleccion_api_sin_selenium", "PASS")
+        
+        except Exception as e:
+            logger.error(f"Test falló: {str(e)}")
+            logger.test_end("test_05_coleccion_api_sin_selenium", "FAIL")
+            raise
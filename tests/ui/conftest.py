@@ -1,14 +1,24 @@
 import pytest
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 import os
-import base64
-from pages import LoginPage, InventoryPage
-from utils import get_logger, capturar_pantalla, config, limpiar_navegador
+import threading
+from pathlib import Path
+import time
+import pytest_html
+from driver_pool import DriverPool
+from pages import LoginPage, InventoryPage, locator_registry, reset_metrics, wait_metrics
+from screenshots import get_screenshot_pipeline
+from utils import get_logger, config, data_loader, limpiar_navegador, span_recorder, tabla_spans_html, estadisticas_sesion
 
 logger = get_logger(__name__)
 
+# Screenshots agregadas al reporte HTML (para el resumen de tamaño del reporte, en el conftest raíz)
+_SCREENSHOT_REPORT_STATS = estadisticas_sesion.setdefault(
+    "reporte", {"embebidas": 0, "bytes_embebidos": 0, "enlazadas": 0, "bytes_enlazados": 0}
+)
+# Los bytes enlazados en modo link se suman desde el thread del pipeline al terminar cada imagen
+_SCREENSHOT_STATS_LOCK = threading.Lock()
+
 
 def _configurar_chrome_options():
     """
@@ -62,30 +72,35 @@ def _configurar_chrome_options():
     return options
 
 
+@pytest.fixture(scope="session")
+def driver_pool():
+    """
+    Pool de navegadores calientes por worker (DRIVER_POOL_SIZE, DRIVER_MAX_USES).
+    Evita lanzar un Chrome nuevo en cada test.
+    """
+    pool = DriverPool(_configurar_chrome_options)
+    pool.warm_up()
+    
+    yield pool
+    
+    pool.close()
+
+
 @pytest.fixture(scope="function")
-def driver(request):
+def driver(request, driver_pool):
     """
     Fixture de WebDriver con scope FUNCTION para aislamiento total.
-    Cada test obtiene un navegador completamente nuevo.
+    Cada test obtiene un navegador limpio: reutilizado del pool y reseteado
+    (cookies + storage + ventanas) o nuevo si el anterior se recicló.
     """
     test_name = request.node.name
     logger.info(f"Iniciando test: {test_name}")
     
-    # Configurar Chrome
-    options = _configurar_chrome_options()
-    
-    # Inicializar WebDriver
+    # Obtener WebDriver del pool
     driver_instance = None
     try:
-        logger.info("Inicializando WebDriver con Selenium Manager...")
-        service = Service()
-        driver_instance = webdriver.Chrome(service=service, options=options)
-        
-        # Configurar timeouts
-        driver_instance.implicitly_wait(10)
-        driver_instance.set_page_load_timeout(30)
-        
-        logger.info("WebDriver listo")
+        with logger.span("driver.acquire"):
+            driver_instance = driver_pool.acquire()
         
     except Exception as e:
         logger.error(f"Error al inicializar WebDriver: {e}")
@@ -95,23 +110,16 @@ def driver(request):
     
     # Teardown
     try:
-        # Capturar screenshot si falló
+        # Capturar screenshot si falló: solo la captura bloquea, el procesamiento
+        # corre en segundo plano y se adjunta al reporte en la fase de teardown
         if hasattr(request.node, 'rep_call') and request.node.rep_call.failed:
             logger.warning(f"Test FALLÓ")
             
             try:
-                screenshot_path = capturar_pantalla(driver_instance, test_name, "FAILED")
-                logger.info(f"Screenshot: {screenshot_path}")
-                
-                # Embeber en reporte HTML
-                with open(screenshot_path, 'rb') as f:
-                    img_data = base64.b64encode(f.read()).decode()
-                
-                html = f'<div><img src="data:image/png;base64,{img_data}" style="max-width:100%; border:2px solid red;"/></div>'
-                
-                extra = getattr(request.node, 'extra', [])
-                extra.append(pytest.html.extras.html(html))
-                request.node.extra = extra
+                future = get_screenshot_pipeline().capture(
+                    driver_instance, test_name, "FAILED", report_mode=_modo_screenshots(request.config)
+                )
+                request.node.screenshot_futures = getattr(request.node, 'screenshot_futures', []) + [future]
             
             except Exception as e:
                 logger.warning(f"No se pudo capturar screenshot: {e}")
@@ -119,40 +127,87 @@ def driver(request):
             logger.info(f"Test EXITOSO")
     
     finally:
-        # Cerrar WebDriver siempre
+        # Devolver el WebDriver al pool (o cerrarlo si corresponde reciclarlo)
         if driver_instance:
             try:
-                limpiar_navegador(driver_instance, logger)
-                driver_instance.quit()
-                logger.info("WebDriver cerrado y limpiado")
+                with logger.span("driver.release"):
+                    driver_pool.release(driver_instance)
             except Exception as e:
-                logger.warning(f"Error al cerrar driver: {e}")
+                logger.warning(f"Error al liberar driver: {e}")
+
+
+@pytest.fixture(scope="session")
+def login_state_cache():
+    """
+    Estado de sesión (cookies + localStorage) capturado del primer login real,
+    indexado por usuario. Uno por worker; acumula también los tiempos de cada vía de login.
+    """
+    cache = {"estados": {}, "tiempos": {"inyeccion": [], "formulario": []}}
+    
+    yield cache
+    
+    for via, tiempos in cache["tiempos"].items():
+        if tiempos:
+            promedio = sum(tiempos) / len(tiempos)
+            logger.info(f"Login vía {via}: {len(tiempos)} vez/veces, promedio {promedio:.0f} ms")
 
 
 @pytest.fixture(scope="function")
-def logged_in_driver(driver):
+def logged_in_driver(driver, login_state_cache):
     """
     Fixture que entrega un driver ya logueado con garantía de carrito vacío.
+    Intenta primero inyectar el estado de sesión cacheado (LOGIN_STATE_INJECTION)
+    y recurre al login por formulario solo si la inyección falla.
     """
     logger.info("Fixture 'logged_in_driver': Realizando login limpio...")
     
+    usuario = data_loader.get_usuario("standard_user")
+    username, password = usuario["username"], usuario["password"]
     login_page = LoginPage(driver)
     inventory_page = InventoryPage(driver)
     
     # PASO 1: Limpiar storage antes del login
     limpiar_navegador(driver, logger)
     
-    # PASO 2: Navegar y hacer login
-    login_page.navigate()
-    login_page.login("standard_user", "secret_sauce")
+    # PASO 2: Login vía inyección de estado (rápido); el storage limpio garantiza carrito vacío
+    inyectado = False
+    state = login_state_cache["estados"].get(username)
+    if config.LOGIN_STATE_INJECTION and state:
+        inicio = time.perf_counter()
+        try:
+            with logger.span("login.inyeccion"):
+                inyectado = login_page.inject_session_state(state) and inventory_page.is_loaded()
+        except Exception as e:
+            logger.warning(f"Inyección de estado de sesión falló: {e}")
+        
+        if inyectado:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            login_state_cache["tiempos"]["inyeccion"].append(duracion_ms)
+            logger.info(f"Login vía inyección de estado en {duracion_ms:.0f} ms")
+        else:
+            login_state_cache["estados"].pop(username, None)
+            limpiar_navegador(driver, logger)
     
-    # PASO 3: Asegurar que estamos en la página de inventario
-    assert inventory_page.is_loaded(), "No se pudo cargar la página de inventario después del login."
-    logger.info("Login exitoso, página de inventario cargada")
+    # PASO 3: Fallback - navegar y hacer login por formulario
+    if not inyectado:
+        inicio = time.perf_counter()
+        with logger.span("login.formulario"):
+            login_page.navigate()
+            login_page.login(username, password)
+            
+            assert inventory_page.is_loaded(), "No se pudo cargar la página de inventario después del login."
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        login_state_cache["tiempos"]["formulario"].append(duracion_ms)
+        logger.info(f"Login vía formulario en {duracion_ms:.0f} ms")
+        
+        if config.LOGIN_STATE_INJECTION:
+            login_state_cache["estados"][username] = login_page.capture_session_state()
+        
+        # Garantizar carrito vacío usando el método refactorizado
+        logger.info("Garantizando carrito vacío...")
+        inventory_page.reset_app_state()
     
-    # PASO 4: Garantizar carrito vacío usando el método refactorizado
-    logger.info("Garantizando carrito vacío...")
-    inventory_page.reset_app_state()
+    logger.info("Login exitoso, página de inventario cargada")
     
     # Verificación final
     final_count = inventory_page.get_cart_count()
@@ -169,12 +224,117 @@ def logged_in_driver(driver):
     limpiar_navegador(driver, logger)
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    """Abre el registro de spans del test; el setup (driver, login) es su primer span"""
+    span_recorder.begin_test(item.nodeid)
+    with span_recorder.span("setup"):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    with span_recorder.span("call"):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    with span_recorder.span("teardown"):
+        yield
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Captura resultado del test"""
+    """Captura resultado del test y adjunta el desglose de tiempos al final"""
     outcome = yield
     rep = outcome.get_result()
     setattr(item, f"rep_{rep.when}", rep)
+    
+    if rep.when == "teardown":
+        extras = getattr(rep, "extras", [])
+        
+        # Screenshots procesadas en segundo plano mientras el driver volvía al pool
+        for future in getattr(item, "screenshot_futures", []):
+            if future.report_mode == "link":
+                # La ruta del objeto se conoce por su hash: se enlaza sin esperar el procesamiento
+                logger.info(f"Screenshot: {future.path}")
+                extras.append(pytest_html.extras.html(_screenshot_link_html(item.config, future)))
+                continue
+            
+            # Modo embed: pytest-html necesita el data URI, hay que esperar la codificación
+            try:
+                captura = future.result(timeout=30)
+            except Exception as e:
+                logger.warning(f"No se pudo procesar screenshot: {e}")
+                continue
+            logger.info(f"Screenshot: {captura['path']}")
+            extras.append(pytest_html.extras.html(_screenshot_html(item.config, captura)))
+        
+        filas = span_recorder.end_test()
+        if filas:
+            extras.append(pytest_html.extras.html(tabla_spans_html(filas, "¿En qué se fue el tiempo?")))
+        rep.extras = extras
+
+
+def _modo_screenshots(pytest_config):
+    """embed o link, según --screenshot-report-mode o SCREENSHOT_REPORT_MODE"""
+    return pytest_config.getoption("--screenshot-report-mode") or config.SCREENSHOT_REPORT_MODE
+
+
+def _screenshot_html(pytest_config, captura):
+    """
+    HTML de una screenshot ya procesada: data URI completo (modo embed, primera aparición)
+    o enlace al archivo compartido si la imagen ya se embebió en otro test (mismo hash).
+    """
+    if captura["data_uri"]:
+        _SCREENSHOT_REPORT_STATS["embebidas"] += 1
+        _SCREENSHOT_REPORT_STATS["bytes_embebidos"] += len(captura["data_uri"])
+        return f'<div><img src="{captura["data_uri"]}" style="max-width:100%; border:2px solid red;"/></div>'
+    
+    _SCREENSHOT_REPORT_STATS["enlazadas"] += 1
+    _sumar_bytes_enlazados(captura["bytes"])
+    return _enlace_screenshot_html(pytest_config, captura["path"], captura.get("thumbnail_uri"))
+
+
+def _screenshot_link_html(pytest_config, future):
+    """
+    HTML de una screenshot en modo link sin esperar su procesamiento: usa la miniatura si
+    ya está lista; si no, la imagen en disco se carga en diferido al abrir el reporte.
+    """
+    _SCREENSHOT_REPORT_STATS["enlazadas"] += 1
+    future.add_done_callback(_sumar_bytes_al_terminar)
+    miniatura = None
+    if future.done() and future.exception() is None:
+        miniatura = future.result()["thumbnail_uri"]
+    return _enlace_screenshot_html(pytest_config, future.path, miniatura)
+
+
+def _sumar_bytes_al_terminar(future):
+    if future.exception() is None:
+        _sumar_bytes_enlazados(future.result()["bytes"])
+
+
+def _sumar_bytes_enlazados(bytes_en_disco):
+    with _SCREENSHOT_STATS_LOCK:
+        _SCREENSHOT_REPORT_STATS["bytes_enlazados"] += bytes_en_disco
+
+
+def _enlace_screenshot_html(pytest_config, path, miniatura=None):
+    """Miniatura (o la imagen en disco, cargada en diferido) con enlace al archivo"""
+    href = _ruta_relativa_al_reporte(pytest_config, path)
+    src = miniatura or href
+    return (
+        f'<div><a href="{href}" target="_blank">'
+        f'<img src="{src}" loading="lazy" style="max-width:{config.SCREENSHOT_THUMBNAIL_WIDTH}px; border:2px solid red;"/>'
+        f'</a></div>'
+    )
+
+
+def _ruta_relativa_al_reporte(pytest_config, path):
+    """Ruta de un archivo relativa al directorio del reporte HTML (para <img src>)"""
+    reporte = getattr(pytest_config.option, "htmlpath", None) or os.path.join(config.REPORTS_DIR, "report.html")
+    return Path(os.path.relpath(path, os.path.dirname(os.path.abspath(reporte)))).as_posix()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -192,6 +352,42 @@ def setup_test_environment():
     
     yield
     
+    get_screenshot_pipeline().close()
+    
+    spans_nivel_1 = [f for f in span_recorder.session_breakdown() if f["nivel"] == 1]
+    for fila in sorted(spans_nivel_1, key=lambda f: -f["total"])[:10]:
+        logger_env.info(
+            f"Tiempo UI en '{' > '.join(fila['ruta'])}': {fila['total']:.2f}s ({fila['llamadas']} vez/veces)"
+        )
+    
+    for estrategia, datos in reset_metrics.summary().items():
+        logger_env.info(
+            f"reset_app_state vía {estrategia}: {datos['ejecuciones']} ejecuciones, "
+            f"{datos['exitos']} exitosas, promedio {datos['promedio_ms']:.0f} ms"
+        )
+    
+    registro = locator_registry.summary()
+    if registro["hits"] + registro["misses"]:
+        logger_env.info(
+            f"Registro de elementos - hits: {registro['hits']}, misses: {registro['misses']}, "
+            f"obsoletos: {registro['obsoletos']}, invalidaciones: {registro['invalidaciones']}, "
+            f"hit ratio: {registro['hit_ratio']:.1%}"
+        )
+    
+    esperas = wait_metrics.summary()
+    if esperas["esperas"]:
+        logger_env.info(
+            f"Esperas UI - total: {esperas['esperas']}, tiempo: {esperas['total_s']:.2f}s, "
+            f"promedio: {esperas['promedio_ms']:.0f} ms, máx: {esperas['max_ms']:.0f} ms, "
+            f"timeouts: {esperas['timeouts']}, excedidas: {esperas['excedidas']}, "
+            f"uso del presupuesto: {esperas['uso_presupuesto']:.1%}"
+        )
+        for espera in wait_metrics.excedidas():
+            logger_env.warning(
+                f"Espera excedida: {espera['condicion']} {espera['descripcion']} - "
+                f"{espera['duracion']:.2f}s con timeout de {espera['timeout']}s"
+            )
+    
     logger_env.info("="*80)
     logger_env.info("SUITE FINALIZADA")
     logger_env.info("="*80)
@@ -208,5 +404,5 @@ def pytest_configure(config):
         'Sistema': 'Windows AMD64',
         'Python': '3.13.7',
         'Browser': 'Chrome',
-        'Aislamiento': 'Function-scoped drivers'
+        'Aislamiento': 'Pool de drivers con reset entre tests'
     }
\ No newline at end of file
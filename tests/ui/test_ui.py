@@ -1,6 +1,4 @@
 import pytest
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from pages import LoginPage, InventoryPage, CartPage, CheckoutPage
 from utils import get_logger, data_loader, capturar_pantalla
 
@@ -32,9 +30,7 @@ class TestUI:
             login_page.login(usuario['username'], usuario['password'])
             
             # Espera explícita para carga de inventario
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located(inventory_page.INVENTORY)
-            )
+            inventory_page.wait_for(inventory_page.INVENTORY, "present", timeout=15)
             
             # Assert
             logger.step("Verificando que se cargó la página de inventario")
@@ -159,23 +155,17 @@ class TestUI:
             inventory_page.go_to_cart()
             
             # Esperar a que la URL cambie a la página del carrito
-            WebDriverWait(logged_in_driver, 15).until(
-                EC.url_contains("cart.html")
-            )
+            cart_page.wait_for_url("cart.html", timeout=15)
             
             # Esperar carga del carrito
-            WebDriverWait(logged_in_driver, 15).until(
-                EC.presence_of_element_located(cart_page.CART_CONTAINER)
-            )
+            cart_page.wait_for(cart_page.CART_CONTAINER, "present", timeout=15)
             
             # Act - Checkout
             logger.step("Fase 2: Proceso de checkout")
             cart_page.checkout()
             
             # Esperar carga de formulario
-            WebDriverWait(logged_in_driver, 15).until(
-                EC.presence_of_element_located(checkout_page.CHECKOUT_INFO)
-            )
+            checkout_page.wait_for(checkout_page.CHECKOUT_INFO, "present", timeout=15)
             
             logger.step(f"Completando información: {checkout_data['first_name']} {checkout_data['last_name']}")
             checkout_page.fill_information(
@@ -189,17 +179,13 @@ class TestUI:
             checkout_page.click_continue()
             
             # Esperar botón finish
-            WebDriverWait(logged_in_driver, 15).until(
-                EC.element_to_be_clickable(checkout_page.FINISH_BTN)
-            )
+            checkout_page.wait_for(checkout_page.FINISH_BTN, "clickable", timeout=15)
             
             logger.step("Finalizando compra")
             checkout_page.click_finish()
             
             # Esperar confirmación
-            WebDriverWait(logged_in_driver, 15).until(
-                EC.presence_of_element_located(checkout_page.COMPLETE_CONTAINER)
-            )
+            checkout_page.wait_for(checkout_page.COMPLETE_CONTAINER, "present", timeout=15)
             
             # Assert
             logger.step("Verificando confirmación de compra")
@@ -237,33 +223,23 @@ class TestUI:
             productos = data_loader.get_productos()
             logger.action(f"Productos a agregar: {len(productos)}")
             
-            # Act - Agregar todos los productos
+            # Act - Agregar todos los productos en un único paso y verificar el badge una vez
             logger.step(f"Agregando {len(productos)} productos al carrito")
-            for idx, producto in enumerate(productos, 1):
-                logger.action(f"Agregando producto {idx}/{len(productos)}: {producto['nombre']}")
-                inventory_page.add_product_to_cart_by_id(producto['id'])
-                
-                # Esperar que el carrito se actualice después de cada producto
-                inventory_page.wait_for_cart_count(expected_count=idx)
-                logger.action(f"Carrito actualizado: {idx} item(s)")
-            
-            # Verificar badge final antes de ir al carrito
-            badge_count = inventory_page.get_cart_count()
+            badge_count = inventory_page.add_products_to_cart(producto['id'] for producto in productos)
             logger.action(f"Badge muestra: {badge_count} item(s)")
             
             logger.step("Navegando al carrito")
             inventory_page.go_to_cart()
             
             # Esperar carga del carrito
-            WebDriverWait(logged_in_driver, 10).until(
-                EC.presence_of_element_located(cart_page.CART_CONTAINER)
-            )
+            cart_page.wait_for(cart_page.CART_CONTAINER, "present", timeout=10)
             
-            # Assert - Verificar cantidad
-            cart_count = cart_page.get_items_count()
+            # Assert - Verificar cantidad (nombres, precios y cantidades en una sola lectura)
+            expected_count = len(productos)
+            items_in_cart = cart_page.get_items(expected_count=expected_count)
+            cart_count = len(items_in_cart)
             logger.action(f"Carrito contiene: {cart_count} item(s)")
             
-            expected_count = len(productos)
             logger.assertion(
                 f"Badge y carrito coinciden ({expected_count} items)", 
                 badge_count == cart_count == expected_count
@@ -273,17 +249,21 @@ class TestUI:
             
             # Assert - Verificar nombres de productos
             logger.step("Verificando que todos los productos están en el carrito")
-            items_in_cart = cart_page.get_item_names()
-            logger.action(f"Productos encontrados en carrito: {items_in_cart}")
+            nombres_en_carrito = [item['nombre'] for item in items_in_cart]
+            logger.action(f"Productos encontrados en carrito: {nombres_en_carrito}")
             
             for producto in productos:
-                product_found = producto['nombre'] in items_in_cart
+                product_found = producto['nombre'] in nombres_en_carrito
                 logger.assertion(
                     f"Producto '{producto['nombre']}' presente en carrito", 
                     product_found
                 )
                 assert product_found, \
-                    f"Producto '{producto['nombre']}' no encontrado. Items en carrito: {items_in_cart}"
+                    f"Producto '{producto['nombre']}' no encontrado. Items en carrito: {nombres_en_carrito}"
+            
+            cantidades_ok = all(item['cantidad'] == 1 and item['precio'] > 0 for item in items_in_cart)
+            logger.assertion("Cada item tiene cantidad 1 y precio válido", cantidades_ok)
+            assert cantidades_ok, f"Cantidades/precios inesperados: {items_in_cart}"
             
             logger.action(f"Todos los {expected_count} productos verificados correctamente")
             logger.test_end("test_05_verificar_productos_en_carrito", "PASS")
@@ -317,15 +297,11 @@ class TestUI:
             
             inventory_page.go_to_cart()
             
-            WebDriverWait(logged_in_driver, 10).until(
-                EC.presence_of_element_located(cart_page.CART_CONTAINER)
-            )
+            cart_page.wait_for(cart_page.CART_CONTAINER, "present", timeout=10)
             
             cart_page.checkout()
             
-            WebDriverWait(logged_in_driver, 10).until(
-                EC.presence_of_element_located(checkout_page.CHECKOUT_INFO)
-            )
+            checkout_page.wait_for(checkout_page.CHECKOUT_INFO, "present", timeout=10)
             
             # Intentar continuar sin llenar información
             logger.step("Intentando continuar sin completar información")
@@ -333,9 +309,7 @@ class TestUI:
             logger.action("Botón 'Continue' clickeado sin datos")
             
             # Esperar mensaje de error
-            WebDriverWait(logged_in_driver, 10).until(
-                EC.presence_of_element_located(checkout_page.ERROR_MSG)
-            )
+            checkout_page.wait_for(checkout_page.ERROR_MSG, "present", timeout=10)
             
             # Assert
             logger.step("Verificando que permanece en la misma página")
@@ -1,44 +1,251 @@
+import atexit
+import csv
+import hashlib
+import html
 import logging
+import logging.handlers
 import os
+import pickle
+import queue
 import json
+import re
+import heapq
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from array import array
 from pathlib import Path
 
 # Variable global para almacenar los handlers ya configurados
 _LOG_HANDLERS_CONFIGURED = False
 _LOG_FILE_PATH = None
+_LOG_SETUP_LOCK = threading.Lock()
+# Listener del modo asíncrono (LOG_ASYNC): formatea y escribe en un thread aparte
+_LOG_LISTENER = None
+# Nivel "quiet perf" (LOG_LEVEL=quiet): solo errores, para corridas de benchmark
+QUIET_PERF = logging.WARNING + 5
+logging.addLevelName(QUIET_PERF, "QUIET")
 
+# Paso actual del test (se agrega a cada evento del sink JSONL)
+_PASO_ACTUAL = None
 
 
-class TestLogger:
-    """Clase para gestionar el logging de tests con un único archivo de log"""
+
+class SpanRecorder:
+    """
+    Registro de spans de tiempo anidados (pila por thread).
+    Agrega duraciones por ruta de spans ("paso > página.método > espera")
+    para el test actual y para toda la sesión.
+    """
     
-    def __init__(self, name, level=logging.INFO):
-        global _LOG_HANDLERS_CONFIGURED, _LOG_FILE_PATH
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.test_actual = None
+        self.por_test = {}
+        self.sesion = {}
+    
+    def _pila(self):
+        if not hasattr(self._local, "pila"):
+            self._local.pila = []
+        return self._local.pila
+    
+    def _registrar(self, ruta, duracion):
+        with self._lock:
+            destinos = [self.sesion]
+            if self.test_actual is not None:
+                destinos.append(self.por_test.setdefault(self.test_actual, {}))
+            for destino in destinos:
+                acumulado = destino.setdefault(ruta, [0, 0.0])
+                acumulado[0] += 1
+                acumulado[1] += duracion
+    
+    def _cerrar(self, pila):
+        nombre, inicio, _ = pila[-1]
+        ruta = tuple(entrada[0] for entrada in pila)
+        pila.pop()
+        duracion = time.perf_counter() - inicio
+        self._registrar(ruta, duracion)
         
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(level)
+        if Config.LOG_JSONL:
+            configurar_logging()
+            logging.getLogger("spans").debug(
+                f"Span {nombre}: {duracion * 1000:.1f} ms",
+                extra={"span": " > ".join(ruta), "duration_ms": round(duracion * 1000, 3), "jsonl_only": True}
+            )
+    
+    @contextmanager
+    def span(self, nombre):
+        """Mide el bloque como un span hijo del span abierto actual"""
+        pila = self._pila()
+        pila.append((nombre, time.perf_counter(), False))
+        profundidad = len(pila)
+        try:
+            yield
+        finally:
+            # Cierra también los pasos abiertos dentro del span
+            while len(pila) >= profundidad:
+                self._cerrar(pila)
+    
+    def step(self, nombre):
+        """
+        Abre un paso secuencial: dura hasta el próximo paso o el cierre del span/test que lo contiene.
+        Fuera de un test registrado (begin_test), p. ej. en los tests de API, no se registra.
+        """
+        if self.test_actual is None:
+            return
+        pila = self._pila()
+        if pila and pila[-1][2]:
+            self._cerrar(pila)
+        pila.append((nombre, time.perf_counter(), True))
+    
+    def begin_test(self, nodeid):
+        self._pila().clear()
+        self.test_actual = nodeid
+        self.por_test[nodeid] = {}
+    
+    def end_test(self):
+        """Cierra los spans abiertos del test y retorna su desglose"""
+        pila = self._pila()
+        while pila:
+            self._cerrar(pila)
+        nodeid, self.test_actual = self.test_actual, None
+        return self.breakdown(self.por_test.pop(nodeid, {}))
+    
+    def session_breakdown(self):
+        return self.breakdown(self.sesion)
+    
+    def exportar(self):
+        """Agregado de la sesión serializable (para enviarlo del worker de xdist al controlador)"""
+        with self._lock:
+            return [[list(ruta), llamadas, total] for ruta, (llamadas, total) in self.sesion.items()]
+    
+    def importar(self, exportado):
+        """Suma al agregado de la sesión el exportado por un worker"""
+        with self._lock:
+            for ruta, llamadas, total in exportado:
+                acumulado = self.sesion.setdefault(tuple(ruta), [0, 0.0])
+                acumulado[0] += llamadas
+                acumulado[1] += total
+    
+    @staticmethod
+    def breakdown(agregado):
+        """
+        Filas ordenadas como árbol (cada span seguido de sus hijos, los más costosos primero):
+        ruta, nivel, llamadas, total y tiempo propio (total menos el de sus hijos directos) en segundos.
+        """
+        hijos = {}
+        for ruta in agregado:
+            hijos.setdefault(ruta[:-1], []).append(ruta)
         
-        # Configurar handlers solo una vez para todos los loggers
-        if not _LOG_HANDLERS_CONFIGURED:
-            self._setup_handlers()
-            _LOG_HANDLERS_CONFIGURED = True
+        filas = []
+        
+        def recorrer(padre):
+            for ruta in sorted(hijos.get(padre, []), key=lambda r: -agregado[r][1]):
+                llamadas, total = agregado[ruta]
+                tiempo_hijos = sum(agregado[hijo][1] for hijo in hijos.get(ruta, []))
+                filas.append({
+                    "ruta": ruta,
+                    "nombre": ruta[-1],
+                    "nivel": len(ruta) - 1,
+                    "llamadas": llamadas,
+                    "total": total,
+                    "propio": max(total - tiempo_hijos, 0.0)
+                })
+                recorrer(ruta)
+        
+        recorrer(())
+        return filas
+
+
+span_recorder = SpanRecorder()
+
+
+# Ordena la tabla de spans al hacer click en un encabezado (numérico salvo la columna de nombre)
+SCRIPT_ORDENAR_SPANS = """
+<script>
+function ordenarTablaSpans(th) {
+    var tabla = th.closest('table'), cuerpo = tabla.tBodies[0], col = th.cellIndex;
+    var asc = th.dataset.asc !== 'true';
+    th.dataset.asc = asc;
+    Array.from(cuerpo.rows).sort(function (a, b) {
+        var x = a.cells[col].dataset.valor, y = b.cells[col].dataset.valor;
+        var r = col === 0 ? x.localeCompare(y) : parseFloat(x) - parseFloat(y);
+        return asc ? r : -r;
+    }).forEach(function (fila) { cuerpo.appendChild(fila); });
+}
+</script>
+"""
+
+
+def tabla_spans_html(filas, titulo):
+    """
+    Tabla de spans estilo flame chart: cada fila indentada según su nivel con una barra
+    proporcional a su tiempo total sobre el total de los spans raíz. Columnas ordenables.
+    """
+    total_raiz = sum(f["total"] for f in filas if f["nivel"] == 0) or 1.0
+    encabezados = "".join(
+        f'<th style="cursor:pointer" onclick="ordenarTablaSpans(this)">{nombre}</th>'
+        for nombre in ("Span", "Llamadas", "Total (ms)", "Propio (ms)", "% del total")
+    )
+    
+    filas_html = []
+    for fila in filas:
+        porcentaje = fila["total"] / total_raiz * 100
+        nombre = html.escape(fila["nombre"])
+        barra = (
+            f'<div style="margin-left:{fila["nivel"] * 16}px">{nombre}'
+            f'<div style="background:#f0a030;height:4px;width:{porcentaje:.1f}%"></div></div>'
+        )
+        filas_html.append(
+            "<tr>"
+            f'<td data-valor="{html.escape(" > ".join(fila["ruta"]))}">{barra}</td>'
+            f'<td data-valor="{fila["llamadas"]}">{fila["llamadas"]}</td>'
+            f'<td data-valor="{fila["total"] * 1000:.1f}">{fila["total"] * 1000:.1f}</td>'
+            f'<td data-valor="{fila["propio"] * 1000:.1f}">{fila["propio"] * 1000:.1f}</td>'
+            f'<td data-valor="{porcentaje:.1f}">{porcentaje:.1f}%</td>'
+            "</tr>"
+        )
     
-    def _setup_handlers(self):
-        """Configura los handlers de logging una sola vez"""
+    return (
+        f"<div><h4>{html.escape(titulo)}</h4>"
+        f'<table class="spans"><thead><tr>{encabezados}</tr></thead>'
+        f'<tbody>{"".join(filas_html)}</tbody></table></div>'
+    )
+
+
+class TestLogger:
+    """
+    Clase para gestionar el logging de tests con un único archivo de log.
+    Los métodos aceptan formateo diferido al estilo logging ("Buscando: %s", locator):
+    si el nivel está deshabilitado se descartan antes de formatear el mensaje.
+    """
+    
+    def __init__(self, name, level=None):
+        self.logger = logging.getLogger(name)
+        self.logger.setLevel(Config.log_level() if level is None else level)
+    
+    @staticmethod
+    def _setup_handlers():
+        """Configura los handlers de logging una sola vez (ver configurar_logging)"""
         global _LOG_FILE_PATH
         
         log_dir = Path("logs")
         log_dir.mkdir(exist_ok=True)
         
-        # Archivo único para todo
-        _LOG_FILE_PATH = log_dir / "pytest_execution.log"
+        # Archivo único para todo; cada worker de xdist escribe el suyo
+        # y el proceso principal los consolida al final de la sesión
+        worker_id = get_worker_id()
+        if worker_id == "master":
+            _LOG_FILE_PATH = log_dir / "pytest_execution.log"
+            worker_tag = ""
+        else:
+            _LOG_FILE_PATH = log_dir / f"pytest_execution_{worker_id}.log"
+            worker_tag = f"[{worker_id}] "
         
         # Formatter común
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        formatter = crear_formatter(worker_tag)
         
         # File Handler - MODO APPEND para acumular logs
         file_handler = logging.FileHandler(
@@ -48,11 +255,20 @@ class TestLogger:
         )
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
+        file_handler.addFilter(_excluir_solo_jsonl)
         
         # Console Handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
+        console_handler.addFilter(_excluir_solo_jsonl)
+        
+        handlers = [file_handler, console_handler]
+        
+        # JSONL Handler - eventos estructurados, rotado por tamaño
+        if Config.LOG_JSONL:
+            handlers.append(crear_handler_jsonl(log_dir, worker_id))
+            _instalar_contexto_de_test()
         
         # Agregar handlers al logger ROOT para que TODOS los loggers los hereden
         root_logger = logging.getLogger()
@@ -61,62 +277,313 @@ class TestLogger:
         # Limpiar handlers existentes del root logger para evitar duplicados
         root_logger.handlers.clear()
         
-        root_logger.addHandler(file_handler)
-        root_logger.addHandler(console_handler)
+        if Config.LOG_ASYNC:
+            # El thread del test solo encola; formato e I/O corren en el listener
+            global _LOG_LISTENER
+            queue_handler, _LOG_LISTENER = crear_handler_asincrono(handlers, maxsize=Config.LOG_QUEUE_SIZE)
+            _LOG_LISTENER.start()
+            atexit.register(detener_logging_asincrono)
+            root_logger.addHandler(queue_handler)
+        else:
+            for handler in handlers:
+                root_logger.addHandler(handler)
         
         # Log de inicio de sesión
         root_logger.info(f"SESIÓN DE TESTS INICIADA - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         root_logger.info(f"Archivo de log: {_LOG_FILE_PATH}")
     
-    def info(self, message):
-        self.logger.info(message)
+    def _emitir(self, level, message, args, **kwargs):
+        # stacklevel=3: filename/lineno del registro apuntan a quien llama al método público
+        if not _LOG_HANDLERS_CONFIGURED:
+            configurar_logging()
+        self.logger.log(level, message, *args, stacklevel=3, **kwargs)
+    
+    def info(self, message, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emitir(logging.INFO, message, args, **kwargs)
     
-    def debug(self, message):
-        self.logger.debug(message)
+    def debug(self, message, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emitir(logging.DEBUG, message, args, **kwargs)
     
-    def warning(self, message):
-        self.logger.warning(message)
+    def warning(self, message, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emitir(logging.WARNING, message, args, **kwargs)
     
-    def error(self, message):
-        self.logger.error(message)
+    def error(self, message, *args, **kwargs):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emitir(logging.ERROR, message, args, **kwargs)
+    
+    def is_enabled_for(self, level=logging.DEBUG):
+        """Para proteger argumentos caros de calcular (p. ej. un round trip a WebDriver)"""
+        return self.logger.isEnabledFor(level)
+    
+    def set_level(self, level):
+        """Cambia el nivel del logger (p. ej. QUIET_PERF durante un benchmark)"""
+        self.logger.setLevel(level)
     
     def test_start(self, test_name):
-        self.logger.info(f"INICIO DE TEST: {test_name}")
+        global _PASO_ACTUAL
+        _PASO_ACTUAL = None
+        self.info("INICIO DE TEST: %s", test_name)
     
     def test_end(self, test_name, status):
-        self.logger.info(f"FIN DE TEST: {test_name} - Estado: {status}")
+        global _PASO_ACTUAL
+        self.info("FIN DE TEST: %s - Estado: %s", test_name, status)
+        _PASO_ACTUAL = None
     
     def step(self, step_description):
-        self.logger.info(f"PASO: {step_description}")
+        global _PASO_ACTUAL
+        _PASO_ACTUAL = step_description
+        self.info("PASO: %s", step_description)
+        span_recorder.step(f"PASO: {step_description}")
     
-    def action(self, action_description):
-        self.logger.debug(f"ACCIÓN: {action_description}")
+    def span(self, name):
+        """Context manager que mide un bloque como span anidado (ver SpanRecorder)"""
+        return span_recorder.span(name)
+    
+    def action(self, action_description, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emitir(logging.DEBUG, "ACCIÓN: " + action_description, args)
     
     def assertion(self, assertion_description, result):
         status = "PASS" if result else "FAIL"
-        self.logger.info(f"{status} ASERCIÓN: {assertion_description}")
-    
-    def api_request(self, method, url, status_code=None):
+        self.info("%s ASERCIÓN: %s", status, assertion_description)
+    
+    def api_request(self, method, url, status_code=None, latency_ms=None, jsonl_only=False):
+        """
+        Registra una request HTTP. Los campos van estructurados al sink JSONL;
+        con jsonl_only=True (requests que registra el APIClient) no se escriben en el log de texto.
+        """
+        if (jsonl_only and not Config.LOG_JSONL) or not self.logger.isEnabledFor(logging.INFO):
+            return
         msg = f"API {method}: {url}"
         if status_code:
             msg += f" - Status: {status_code}"
-        self.logger.info(msg)
+        if latency_ms is not None:
+            msg += f" - {latency_ms:.1f} ms"
+        self._emitir(logging.INFO, msg, (), extra={
+            "http_method": method,
+            "http_url": url,
+            "http_status": status_code,
+            "latency_ms": round(latency_ms, 2) if latency_ms is not None else None,
+            "jsonl_only": jsonl_only
+        })
     
     def screenshot_taken(self, path):
-        self.logger.warning(f"Screenshot capturado: {path}")
+        self.warning("Screenshot capturado: %s", path)
 
 
 def get_logger(name):
-    """Factory function para obtener un logger"""
+    """Factory function para obtener un logger (no configura handlers: eso ocurre al primer registro)"""
     return TestLogger(name)
 
 
+def configurar_logging():
+    """
+    Configura los handlers del root logger una sola vez por proceso.
+    Se invoca al emitir el primer registro, así importar un módulo no crea archivos de log.
+    """
+    global _LOG_HANDLERS_CONFIGURED
+    if _LOG_HANDLERS_CONFIGURED:
+        return
+    with _LOG_SETUP_LOCK:
+        if not _LOG_HANDLERS_CONFIGURED:
+            TestLogger._setup_handlers()
+            _LOG_HANDLERS_CONFIGURED = True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objeto JSON por línea con el contexto del test y los campos estructurados del registro"""
+    
+    CAMPOS = ("nodeid", "step", "span", "duration_ms", "http_method", "http_url", "http_status", "latency_ms")
+    
+    def format(self, record):
+        evento = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "worker": get_worker_id(),
+            "message": record.getMessage(),
+        }
+        for campo in self.CAMPOS:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                evento[campo] = valor
+        if record.exc_info:
+            evento["exception"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False)
+
+
+def crear_handler_jsonl(log_dir, worker_id="master"):
+    """
+    Handler del sink JSONL (logs/pytest_events[_gwN].jsonl), rotado al superar
+    LOG_JSONL_MAX_BYTES y con LOG_JSONL_BACKUPS archivos de respaldo como máximo.
+    """
+    nombre = "pytest_events.jsonl" if worker_id == "master" else f"pytest_events_{worker_id}.jsonl"
+    handler = logging.handlers.RotatingFileHandler(
+        Path(log_dir) / nombre,
+        maxBytes=Config.LOG_JSONL_MAX_BYTES,
+        backupCount=Config.LOG_JSONL_BACKUPS,
+        encoding='utf-8'
+    )
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(JsonLinesFormatter())
+    return handler
+
+
+def _excluir_solo_jsonl(record):
+    """Filtro de los handlers de texto: descarta eventos destinados solo al sink JSONL"""
+    return not getattr(record, "jsonl_only", False)
+
+
+def _instalar_contexto_de_test():
+    """
+    Agrega nodeid y paso actual a cada registro al crearlo (en el thread del test),
+    así el contexto es correcto aunque el formateo ocurra después en el listener asíncrono.
+    """
+    factory_original = logging.getLogRecordFactory()
+    
+    def factory(*args, **kwargs):
+        record = factory_original(*args, **kwargs)
+        test_actual = os.environ.get("PYTEST_CURRENT_TEST")
+        # PYTEST_CURRENT_TEST = "<nodeid> (setup|call|teardown)"
+        record.nodeid = test_actual.rsplit(" (", 1)[0] if test_actual else None
+        record.step = _PASO_ACTUAL
+        return record
+    
+    logging.setLogRecordFactory(factory)
+
+
+def crear_formatter(worker_tag=""):
+    """Formatter de texto común a todos los handlers del framework"""
+    return logging.Formatter(
+        '%(asctime)s - ' + worker_tag + '%(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+
+class _BlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler con buffer acotado: si la cola está llena el test espera (backpressure)
+    en lugar de perder registros. El formateo se difiere al thread del listener.
+    """
+    
+    def prepare(self, record):
+        return record
+    
+    def enqueue(self, record):
+        self.queue.put(record, block=True)
+
+
+def crear_handler_asincrono(handlers, maxsize=0):
+    """
+    Arma el par QueueHandler/QueueListener que envía los registros a los handlers dados
+    desde un thread en segundo plano. Retorna (queue_handler, listener) sin iniciar.
+    """
+    cola = queue.Queue(maxsize=maxsize)
+    listener = logging.handlers.QueueListener(cola, *handlers, respect_handler_level=True)
+    return _BlockingQueueHandler(cola), listener
+
+
+def flush_logs():
+    """
+    Garantiza que todo lo logueado hasta ahora esté escrito en disco:
+    en modo asíncrono espera a que el listener vacíe la cola.
+    Se llama ante un test fallido y al final de la sesión.
+    """
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.queue.join()
+        handlers = _LOG_LISTENER.handlers
+    else:
+        handlers = logging.getLogger().handlers
+    
+    # Solo los archivos: el stream de consola puede estar ya cerrado por la captura de pytest
+    for handler in handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.flush()
+
+
+def detener_logging_asincrono():
+    """Vacía la cola y detiene el listener (registrado con atexit)"""
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        _LOG_LISTENER = None
+
+
 def get_log_file_path():
     """Retorna la ruta del archivo de log actual"""
     global _LOG_FILE_PATH
     return str(_LOG_FILE_PATH) if _LOG_FILE_PATH else "No inicializado"
 
 
+def get_worker_id():
+    """ID del worker de pytest-xdist ("gw0", "gw1", ...) o "master" si no hay paralelismo"""
+    return os.getenv("PYTEST_XDIST_WORKER", "master")
+
+
+_LOG_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} - ")
+
+
+def _leer_registros_log(path):
+    """Agrupa las líneas de un log en registros (un registro puede tener varias líneas)"""
+    registro = []
+    with open(path, "r", encoding="utf-8") as f:
+        for linea in f:
+            if _LOG_TIMESTAMP.match(linea) and registro:
+                yield "".join(registro)
+                registro = []
+            registro.append(linea)
+    if registro:
+        yield "".join(registro)
+
+
+def consolidar_logs_workers(log_dir="logs"):
+    """
+    Consolida los logs por worker (pytest_execution_gw*.log) en el log único,
+    intercalando los registros por timestamp, y elimina los archivos de los workers.
+    """
+    log_dir = Path(log_dir)
+    worker_logs = sorted(log_dir.glob("pytest_execution_gw*.log"))
+    if not worker_logs:
+        return 0
+
+    flush_logs()
+
+    # Los registros empiezan con "YYYY-mm-dd HH:MM:SS", que ordena lexicográficamente
+    registros = heapq.merge(*(_leer_registros_log(path) for path in worker_logs), key=lambda r: r[:19])
+    with open(log_dir / "pytest_execution.log", "a", encoding="utf-8") as destino:
+        destino.writelines(registros)
+
+    for path in worker_logs:
+        path.unlink()
+    return len(worker_logs)
+
+
+# Estadísticas de la sesión por grupo ("api", "reporte"...) para los resúmenes finales.
+# Con pytest-xdist cada worker envía las suyas al controlador, que las suma (ver conftest raíz).
+estadisticas_sesion = {}
+
+
+def sumar_estadisticas(destino, origen):
+    """
+    Suma recursivamente las estadísticas de origen en destino: los números se suman, los
+    diccionarios se combinan y el resto de valores (p. ej. el modo del cassette) conserva
+    el primero. Los ratios se omiten: se recalculan a partir de los contadores al mostrarlos.
+    """
+    for clave, valor in origen.items():
+        if clave.endswith("ratio"):
+            continue
+        if isinstance(valor, dict):
+            sumar_estadisticas(destino.setdefault(clave, {}), valor)
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool) and clave in destino:
+            destino[clave] += valor
+        else:
+            destino.setdefault(clave, valor)
+    return destino
+
+
 class Config:
     """Clase para gestionar configuración del framework"""
     
@@ -132,11 +599,74 @@ class Config:
     LOGS_DIR = "logs"
     DATA_DIR = "data"
     
+    # Cache pickle de datasets (en DATA_CACHE_DIR) para archivos de datos grandes
+    DATA_CACHE_DIR = os.getenv('DATA_CACHE_DIR', '.cache/data')
+    DATA_PICKLE_CACHE = os.getenv('DATA_PICKLE_CACHE', 'true').lower() == 'true'
+    DATA_PICKLE_MIN_BYTES = int(os.getenv('DATA_PICKLE_MIN_BYTES', str(1024 * 1024)))
+    
+    # Shard de los casos de DataStream para esta corrida: "i/n" (1-based), vacío = todos
+    DATA_SHARD = os.getenv('DATA_SHARD', '')
+    BENCHMARKS_DIR = "reports/benchmarks"
+    
+    # Logging asíncrono (QueueHandler + QueueListener) y tamaño máximo del buffer de registros
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'false').lower() == 'true'
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    
+    # Nivel de los loggers del framework: DEBUG, INFO, WARNING, ERROR o QUIET (solo errores, para benchmarks)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    
+    # Sink JSONL de eventos estructurados (nodeid, worker, paso, spans, requests HTTP) con rotación por tamaño
+    LOG_JSONL = os.getenv('LOG_JSONL', 'false').lower() == 'true'
+    LOG_JSONL_MAX_BYTES = int(os.getenv('LOG_JSONL_MAX_BYTES', str(10 * 1024 * 1024)))
+    LOG_JSONL_BACKUPS = int(os.getenv('LOG_JSONL_BACKUPS', '3'))
+    
     HEADLESS = os.getenv('HEADLESS', 'false').lower() == 'true'
     CI_MODE = os.getenv('CI', 'false').lower() == 'true'
     
     SCREENSHOT_ON_FAILURE = True
-    
+
+    # Screenshots: formato (png, jpeg o webp; los dos últimos requieren Pillow), calidad y ancho máximo (0 = original)
+    SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'png').lower()
+    SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '80'))
+    SCREENSHOT_MAX_WIDTH = int(os.getenv('SCREENSHOT_MAX_WIDTH', '0'))
+
+    # Screenshots en el reporte HTML: embed (base64 inline) o link (miniatura + enlace al archivo en disco)
+    SCREENSHOT_REPORT_MODE = os.getenv('SCREENSHOT_REPORT_MODE', 'embed').lower()
+    SCREENSHOT_THUMBNAIL_WIDTH = int(os.getenv('SCREENSHOT_THUMBNAIL_WIDTH', '320'))
+
+    # Pool de navegadores por worker: tamaño (0 = navegador nuevo por test) y usos antes de reciclar
+    DRIVER_POOL_SIZE = int(os.getenv('DRIVER_POOL_SIZE', '1'))
+    DRIVER_MAX_USES = int(os.getenv('DRIVER_MAX_USES', '25'))
+
+    # Política de esperas: explicit (sin wait implícito, solo esperas explícitas) o legacy (implícito de IMPLICIT_WAIT)
+    WAIT_POLICY = os.getenv('WAIT_POLICY', 'explicit').lower()
+
+    # Estrategia de espera de los Page Objects: observer (MutationObserver), polling (adaptativo) o selenium (0.5s fijo)
+    WAIT_STRATEGY = os.getenv('WAIT_STRATEGY', 'observer').lower()
+
+    # Login por inyección de cookies/localStorage capturados una vez por sesión (fallback: formulario)
+    LOGIN_STATE_INJECTION = os.getenv('LOGIN_STATE_INJECTION', 'true').lower() == 'true'
+
+    # Backend de la API: "remote" (JSONPlaceholder real) o "local" (servidor en proceso)
+    API_BACKEND = os.getenv('API_BACKEND', 'remote').lower()
+
+    # Cassette de grabación/reproducción HTTP: off, record, replay (offline) o auto
+    API_CASSETTE_MODE = os.getenv('API_CASSETTE_MODE', 'off').lower()
+    API_CASSETTE_PATH = os.getenv('API_CASSETTE_PATH', 'data/cassettes/jsonplaceholder.json.gz')
+
+    # Cache opt-in de respuestas GET de los helpers del APIClient (LRU + TTL en segundos)
+    API_CACHE_ENABLED = os.getenv('API_CACHE', 'false').lower() == 'true'
+    API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '128'))
+    API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '300'))
+
+    # Pool de conexiones HTTP compartido por los tests de API
+    API_POOL_CONNECTIONS = int(os.getenv('API_POOL_CONNECTIONS', '4'))
+    API_POOL_MAXSIZE = int(os.getenv('API_POOL_MAXSIZE', '10'))
+
+    # Modo de carga concurrente: "thread" (pool de threads) o "asyncio" (corrutinas sobre threads)
+    API_CONCURRENCY_BACKEND = os.getenv('API_CONCURRENCY_BACKEND', 'thread').lower()
+    API_CONCURRENCY = int(os.getenv('API_CONCURRENCY', '5'))
+
     @classmethod
     def get(cls, key, default=None):
         return getattr(cls, key, default)
@@ -149,25 +679,43 @@ class Config:
     def is_ci(cls):
         return cls.CI_MODE
 
+    @classmethod
+    def log_level(cls):
+        """Nivel numérico de LOG_LEVEL (INFO si el valor no es válido; QUIET es QUIET_PERF)"""
+        nivel = logging.getLevelName(cls.LOG_LEVEL)
+        return nivel if isinstance(nivel, int) else logging.INFO
+    
+    @classmethod
+    def data_shard(cls):
+        """(indice, total) de DATA_SHARD con índice 0-based, o None si no hay sharding"""
+        if not cls.DATA_SHARD:
+            return None
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", cls.DATA_SHARD)
+        if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            raise ValueError(f"DATA_SHARD inválido: '{cls.DATA_SHARD}' (formato esperado i/n, ej. 1/4)")
+        return int(match.group(1)) - 1, int(match.group(2))
+    
+    @classmethod
+    def implicit_wait(cls):
+        """Wait implícito efectivo según WAIT_POLICY (0 salvo en modo legacy)"""
+        return cls.IMPLICIT_WAIT if cls.WAIT_POLICY == 'legacy' else 0
+
 
 config = Config()
 
 
 def capturar_pantalla(driver, test_name, paso=""):
-    """Captura una screenshot con nombre descriptivo"""
-    screenshot_dir = Path("screenshots")
-    screenshot_dir.mkdir(exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-    clean_test_name = test_name.replace("::", "_").replace(" ", "_")
-    clean_paso = f"_{paso}" if paso else ""
-    
-    filename = f"{clean_test_name}{clean_paso}_{timestamp}.png"
-    filepath = screenshot_dir / filename
+    """
+    Captura una screenshot y retorna su ruta (screenshots/objects/<sha256>.<ext>);
+    el test y el paso quedan registrados en el manifest de screenshots.
+    Solo la captura es bloqueante: la escritura a disco (y recompresión) corre en segundo plano.
+    No va al reporte HTML, así que no se arma data URI ni miniatura.
+    """
+    from screenshots import get_screenshot_pipeline
     
-    driver.save_screenshot(str(filepath))
+    future = get_screenshot_pipeline().capture(driver, test_name, paso, report_mode=None)
     
-    return str(filepath)
+    return future.path
 
 
 def limpiar_navegador(driver, logger=None):
@@ -183,22 +731,121 @@ def limpiar_navegador(driver, logger=None):
             logger.debug("Navegador limpiado (cookies + storage)")
     except Exception as e:
         if logger:
-            logger.debug(f"Error al limpiar navegador: {e}")
+            logger.debug("Error al limpiar navegador: %s", e)
+
+
+# Datasets ya parseados en el proceso: ruta -> (firma, datos). La firma (mtime, tamaño)
+# invalida la entrada si el archivo cambia
+_DATASETS = {}
+_DATASETS_LOCK = threading.Lock()
+
+
+def _firma_archivo(path):
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def cargar_dataset(data_file):
+    """
+    Parsea un JSON de datos una sola vez por proceso (cache por ruta + mtime + tamaño).
+    Archivos de al menos DATA_PICKLE_MIN_BYTES se leen de un pickle en .cache/data
+    cuando está vigente, en lugar de volver a parsear el JSON en cada worker.
+    """
+    path = Path(data_file).resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Archivo de datos no encontrado: {data_file}")
+    
+    firma = _firma_archivo(path)
+    with _DATASETS_LOCK:
+        cacheado = _DATASETS.get(path)
+        if cacheado and cacheado[0] == firma:
+            return cacheado[1]
+        
+        usar_pickle = Config.DATA_PICKLE_CACHE and firma[1] >= Config.DATA_PICKLE_MIN_BYTES
+        datos = _leer_pickle(path, firma) if usar_pickle else None
+        if datos is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if usar_pickle:
+                _escribir_pickle(path, firma, datos)
+        
+        _DATASETS[path] = (firma, datos)
+        return datos
+
+
+def _ruta_pickle(path):
+    digest = hashlib.sha1(str(path).encode()).hexdigest()[:12]
+    return Path(Config.DATA_CACHE_DIR) / f"{path.stem}-{digest}.pickle"
+
+
+def _leer_pickle(path, firma):
+    """Datos del pickle si corresponde a la misma versión del archivo, si no None"""
+    try:
+        with open(_ruta_pickle(path), 'rb') as f:
+            firma_guardada, datos = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return datos if firma_guardada == firma else None
+
+
+def _escribir_pickle(path, firma, datos):
+    """Escritura atómica (tmp + replace): varios workers pueden generarlo a la vez"""
+    destino = _ruta_pickle(path)
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destino.with_name(f"{destino.name}.{get_worker_id()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((firma, datos), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, destino)
+    except OSError as e:
+        logging.getLogger(__name__).debug("No se pudo escribir el cache de datos %s: %s", destino, e)
 
 
 class DataLoader:
-    """Clase para cargar datos de test desde JSON"""
+    """
+    Clase para cargar datos de test desde JSON.
+    El archivo se parsea recién al primer acceso y el resultado se comparte entre
+    todas las instancias del proceso (ver cargar_dataset). Los índices por campo
+    se calculan una vez por clave.
+    """
     
     def __init__(self, data_file="data/test_data.json"):
         self.data_file = Path(data_file)
-        self._data = self._load_data()
+        self._cache = None
+        self._indices = {}
     
-    def _load_data(self):
-        if not self.data_file.exists():
-            raise FileNotFoundError(f"Archivo de datos no encontrado: {self.data_file}")
-        
-        with open(self.data_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    @property
+    def _data(self):
+        if self._cache is None:
+            self._cache = cargar_dataset(self.data_file)
+        return self._cache
+    
+    def reload(self):
+        """Descarta los datos e índices de la instancia; el próximo acceso revalida el archivo"""
+        self._cache = None
+        self._indices.clear()
+    
+    def __getitem__(self, key):
+        return self._data[key]
+    
+    def __contains__(self, key):
+        return key in self._data
+    
+    def keys(self):
+        return self._data.keys()
+    
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+    
+    def index(self, key, campo):
+        """Dict valor de campo -> item de la lista `key` (el primero si se repite)"""
+        clave = ("index", key, campo)
+        if clave not in self._indices:
+            indice = {}
+            for item in self.get(key, []):
+                indice.setdefault(item.get(campo), item)
+            self._indices[clave] = indice
+        return self._indices[clave]
     
     def get_usuarios_validos(self):
         return self._data.get("usuarios_validos", [])
@@ -212,8 +859,105 @@ class DataLoader:
     def get_productos(self):
         return self._data.get("productos", [])
     
-    def get(self, key, default=None):
-        return self._data.get(key, default)
+    def get_usuario(self, username):
+        """Usuario válido o inválido por username, o None"""
+        return self.index("usuarios_validos", "username").get(username) or \
+            self.index("usuarios_invalidos", "username").get(username)
+
+data_loader = DataLoader()
+api_data_loader = DataLoader("data/test_data_api.json")
 
 
-data_loader = DataLoader()
\ No newline at end of file
+class CasoDatos:
+    """
+    Referencia liviana a un caso de un DataStream (archivo + offset de su línea).
+    Es lo que recibe pytest.mark.parametrize: la línea se lee y parsea recién
+    cuando el test llama a load(), en el worker que lo ejecuta.
+    """
+    
+    __slots__ = ("stream", "numero", "offset")
+    
+    def __init__(self, stream, numero, offset):
+        self.stream = stream
+        self.numero = numero
+        self.offset = offset
+    
+    def load(self):
+        return self.stream.leer(self.offset)
+    
+    def __str__(self):
+        return f"{self.stream.path.stem}-{self.numero}"
+    
+    __repr__ = __str__
+
+
+class DataStream:
+    """
+    Fuente de casos JSONL (un objeto JSON por línea) o CSV (con encabezado) leída de forma
+    incremental: al coleccionar solo se indexan los offsets de cada línea, sin parsear
+    su contenido. Los registros CSV no pueden contener saltos de línea dentro de un campo.
+    
+    Uso:
+        stream = DataStream("data/todos_generados.jsonl")
+        @pytest.mark.parametrize("caso", stream.casos(), ids=str)
+        def test_x(caso):
+            datos = caso.load()
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.formato = "csv" if self.path.suffix.lower() == ".csv" else "jsonl"
+        self._offsets = None
+        self._encabezado = None
+    
+    def _indexar(self):
+        """Offsets (bytes) del inicio de cada registro; se recorre el archivo una sola vez"""
+        if self._offsets is not None:
+            return self._offsets
+        
+        offsets = array("q")
+        with open(self.path, "rb") as f:
+            if self.formato == "csv":
+                self._encabezado = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+            offset = f.tell()
+            for linea in f:
+                if linea.strip():
+                    offsets.append(offset)
+                offset += len(linea)
+        self._offsets = offsets
+        return offsets
+    
+    def __len__(self):
+        return len(self._indexar())
+    
+    def leer(self, offset):
+        """Parsea el registro que empieza en offset"""
+        self._indexar()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            linea = f.readline().decode("utf-8")
+        if self.formato == "csv":
+            return dict(zip(self._encabezado, next(csv.reader([linea]))))
+        return json.loads(linea)
+    
+    def casos(self, inicio=0, fin=None, shard=None):
+        """
+        Referencias a los casos [inicio, fin) del archivo, filtradas por shard.
+        
+        Args:
+            inicio/fin: Rango de números de caso (0-based, fin exclusivo)
+            shard: (indice, total) 0-based; por defecto el de DATA_SHARD.
+                   Reparte round-robin: el caso k va al shard k % total
+        """
+        offsets = self._indexar()
+        shard = Config.data_shard() if shard is None else shard
+        numeros = range(inicio, len(offsets) if fin is None else min(fin, len(offsets)))
+        if shard:
+            indice, total = shard
+            numeros = [numero for numero in numeros if numero % total == indice]
+        return [CasoDatos(self, numero, offsets[numero]) for numero in numeros]
+    
+    def __iter__(self):
+        """Recorre todos los registros parseados, uno a la vez"""
+        for offset in self._indexar():
+            yield self.leer(offset)